@@ -1,18 +1,52 @@
 # api/endpoints/psycho.py
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from api.models.psycho_schema import PsychologyRequest, PsychologyResponse, ChatHistoryRequest
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from api.models.psycho_schema import PsychologyRequest, PsychologyBatchRequest, PsychologyResponse, ChatHistoryRequest
+from services.container import ServiceContainer
 from services.psycho_services import PsychologyService
-from services.chat_services import memory_service
+from services.chat_store import HISTORY_FIELDS
+from services.youtube_services import get_youtube_cache_stats
+from core.admission import AdmissionController, AdmissionRejected
+from core.config import Config
 import asyncio
+import hashlib
+import json
 
 router = APIRouter()
 
-# Initialize service once
-psychology_service = PsychologyService()
+def get_services(request: Request) -> ServiceContainer:
+    """The app's lifespan-managed ServiceContainer"""
+    return request.app.state.services
+
+def get_psychology_service(request: Request) -> PsychologyService:
+    return get_services(request).psychology
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    return get_services(request).admission
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def _admit(admission: AdmissionController, user_id: str):
+    """Admission slot for a chat request - 429/503 with Retry-After when refused"""
+    try:
+        return await admission.admit(user_id)
+    except AdmissionRejected as e:
+        raise _rejected(e)
 
 @router.post("/psychology/chat", response_model=PsychologyResponse)
-async def psychology_chat(request: PsychologyRequest):
+async def psychology_chat(request: PsychologyRequest,
+                          psychology_service: PsychologyService = Depends(get_psychology_service),
+                          admission: AdmissionController = Depends(get_admission_controller)):
     """Optimized psychology chat endpoint with async processing"""
+    ticket = await _admit(admission, request.user_id)
     try:
         # Use the async method for better performance
         result = await psychology_service.get_psychology_response_async(
@@ -22,36 +56,150 @@ async def psychology_chat(request: PsychologyRequest):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        ticket.release()
+
+@router.post("/psychology/chat/stream")
+async def psychology_chat_stream(request: PsychologyRequest,
+                                 psychology_service: PsychologyService = Depends(get_psychology_service),
+                                 admission: AdmissionController = Depends(get_admission_controller)):
+    """Streaming psychology chat endpoint - Server-Sent Events"""
+    # Admit before the 200 is sent so rejections are real status codes, not SSE errors
+    ticket = await _admit(admission, request.user_id)
+
+    async def event_stream():
+        try:
+            async for event in psychology_service.stream_psychology_response_async(
+                query=request.query,
+                user_id=request.user_id
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            ticket.release()
+
+    # Background release covers a client that disconnects before the body starts
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release)
+    )
+
+@router.post("/psychology/chat/batch")
+async def psychology_chat_batch(request: PsychologyBatchRequest, http_request: Request,
+                                psychology_service: PsychologyService = Depends(get_psychology_service),
+                                admission: AdmissionController = Depends(get_admission_controller)):
+    """Bulk chat - one NDJSON line per item, in completion order, tagged with its index"""
+    if len(request.items) > Config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {Config.BATCH_MAX_ITEMS} items per batch")
+    concurrency = min(request.concurrency or Config.BATCH_MAX_CONCURRENCY, Config.BATCH_MAX_CONCURRENCY)
+    # The batch call is rate-limited per caller, not per (often synthetic) item user_id
+    caller = http_request.client.host if http_request.client else "unknown"
+    try:
+        admission.check_rate(f"batch:{caller}")
+    except AdmissionRejected as e:
+        raise _rejected(e)
+
+    async def ndjson():
+        # Every in-flight item holds its own admission slot, so batches share the overload bound
+        async for result in psychology_service.process_batch_async(
+            [(item.query, item.user_id) for item in request.items],
+            concurrency,
+            admit=lambda: admission.admit(None),
+            persist=request.persist
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+async def _history_page(psychology_service: PsychologyService,
+                        user_id: str, limit: Optional[int], cursor: Optional[str],
+                        since: Optional[datetime], until: Optional[datetime],
+                        fields: Optional[List[str]], if_none_match: Optional[str]) -> Response:
+    """One history page with next_cursor and an ETag - 304 when the client's copy is current"""
+    limit = 10 if limit is None else limit
+    if not 1 <= limit <= Config.HISTORY_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {Config.HISTORY_MAX_PAGE_SIZE}")
+    if fields is not None and (not fields or set(fields) - set(HISTORY_FIELDS)):
+        raise HTTPException(status_code=400, detail=f"fields must be a subset of {list(HISTORY_FIELDS)}")
+    try:
+        before = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.post("/psychology/history")
-async def get_chat_history(request: ChatHistoryRequest):
-    """Get chat history - async for consistency"""
     try:
         loop = asyncio.get_event_loop()
-        limit = request.limit if request.limit is not None else 10
-        history = await loop.run_in_executor(
-            None,
-            memory_service.get_conversation_history,
-            request.user_id,
-            limit
+        # Version first: a write racing the page read then only costs the client a refetch
+        version = await loop.run_in_executor(
+            psychology_service.executor, psychology_service.memory.history_version, user_id
+        )
+        etag = '"' + hashlib.blake2b(
+            json.dumps([user_id, version, limit, before, since, until, fields], default=str).encode(),
+            digest_size=12
+        ).hexdigest() + '"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        history, has_more = await loop.run_in_executor(
+            psychology_service.executor,
+            psychology_service.memory.get_history_page,
+            user_id,
+            limit,
+            before,
+            since.timestamp() if since else None,
+            until.timestamp() if until else None,
+            fields
         )
-        return {"history": history, "user_id": request.user_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving history: {str(e)}")
 
+    next_cursor = str(history[0]["id"]) if has_more and history else None
+    return JSONResponse(
+        {"history": history, "user_id": user_id, "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+@router.post("/psychology/history")
+async def get_chat_history(request: ChatHistoryRequest, if_none_match: Optional[str] = Header(None),
+                           psychology_service: PsychologyService = Depends(get_psychology_service)):
+    """Get chat history - newest page first, follow next_cursor for older messages"""
+    return await _history_page(
+        psychology_service, request.user_id, request.limit, request.cursor,
+        request.since, request.until, request.fields, if_none_match
+    )
+
+@router.get("/psychology/history/{user_id}")
+async def get_chat_history_page(
+    user_id: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated, e.g. timestamp,user_message,preview"),
+    if_none_match: Optional[str] = Header(None),
+    psychology_service: PsychologyService = Depends(get_psychology_service)
+):
+    """Cacheable history page - same as POST /psychology/history"""
+    return await _history_page(
+        psychology_service, user_id, limit, cursor, since, until,
+        fields.split(",") if fields is not None else None, if_none_match
+    )
+
 @router.get("/psychology/status")
-async def get_system_status():
+async def get_system_status(services: ServiceContainer = Depends(get_services)):
     """Fast system status check"""
-    available_models = []
-    
-    if psychology_service.groq_client:
-        available_models.extend(["llama", "deepseek"])
-    if psychology_service.openai_client:
-        available_models.append("openai")
-    
+    psychology_service = services.psychology
     return {
         "status": "online",
-        "available_models": available_models,
+        "available_models": psychology_service.available_models(),
+        "providers": psychology_service.providers.stats(),
+        "routing": psychology_service.router.stats(),
+        "response_cache": psychology_service.response_cache.stats(),
+        "youtube_cache": get_youtube_cache_stats(),
+        "video_index": services.video_index.stats(),
+        "admission": services.admission.stats(),
+        "persistence": psychology_service.persistence.stats(),
+        "shared_state": services.shared_state.stats(),
         "auto_selection": "enabled",
         "response_optimization": "active"
     }
@@ -1,11 +1,17 @@
 # api/models/psycho_schema.py
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Dict, Optional
 
 class PsychologyRequest(BaseModel):
     query: str
     user_id: str
 
+class PsychologyBatchRequest(BaseModel):
+    items: List[PsychologyRequest]
+    concurrency: Optional[int] = None
+    persist: bool = True  # False: answer without history and save nothing (bulk replays)
+
 class PsychologyResponse(BaseModel):
     response: str
     youtube_videos: List[Dict]
@@ -16,3 +22,7 @@ class PsychologyResponse(BaseModel):
 class ChatHistoryRequest(BaseModel):
     user_id: str
     limit: Optional[int] = 10
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    fields: Optional[List[str]] = None  # e.g. ["timestamp", "user_message", "preview"]
@@ -0,0 +1,105 @@
+# batch_cli.py - Replay many queries through /psychology/chat/batch
+"""Usage:
+    python batch_cli.py queries.jsonl -o results.ndjson
+
+Input is JSON Lines with "query" and optional "user_id", or plain text with
+one query per line. Results are written as NDJSON in completion order; each
+line carries "index", the 0-based position of its query in the input.
+Items are answered without history and nothing is saved unless --persist
+is given.
+"""
+import argparse
+import json
+import sys
+import time
+import requests
+from core.config import Config
+
+
+def read_items(path: str, default_user: str):
+    """Yield (query, user_id) from a JSONL or plain-text file ('-' for stdin)"""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with stream:
+        for n, line in enumerate(stream):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                item = json.loads(line)
+                yield {"query": item["query"], "user_id": str(item.get("user_id") or f"{default_user}-{n}")}
+            else:
+                yield {"query": line, "user_id": f"{default_user}-{n}"}
+
+
+def chunks(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(session: requests.Session, url: str, items, concurrency: int, persist: bool, offset: int, out) -> int:
+    """Send one batch, retrying on 429/503 per Retry-After - returns failed item count"""
+    payload = {"items": items, "concurrency": concurrency, "persist": persist}
+    while True:
+        response = session.post(url, json=payload, stream=True, timeout=(10, None))
+        if response.status_code in (429, 503):
+            delay = float(response.headers.get("Retry-After", "5"))
+            print(f"Server busy ({response.status_code}), retrying in {delay:.0f}s", file=sys.stderr)
+            response.close()
+            time.sleep(delay)
+            continue
+        response.raise_for_status()
+        break
+
+    failed = 0
+    with response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            result["index"] += offset
+            if result.get("model_used") == "error":
+                failed += 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk psychology chat via the batch endpoint")
+    parser.add_argument("input", help="JSONL or text file of queries ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default stdout)")
+    parser.add_argument("--api-url", default=Config.API_BASE_URL or "http://localhost:8000")
+    parser.add_argument("--batch-size", type=int, default=Config.BATCH_MAX_ITEMS)
+    parser.add_argument("--concurrency", type=int, default=Config.BATCH_MAX_CONCURRENCY)
+    parser.add_argument("--user-prefix", default="batch", help="user_id prefix for items without one")
+    parser.add_argument("--persist", action="store_true",
+                        help="Use and save each user_id's history (default: stateless, nothing saved)")
+    args = parser.parse_args()
+
+    url = f"{args.api_url.rstrip('/')}/api/v1/psychology/chat/batch"
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    session = requests.Session()
+    started = time.perf_counter()
+    total = failed = 0
+
+    try:
+        for chunk in chunks(read_items(args.input, args.user_prefix), args.batch_size):
+            failed += run_batch(session, url, chunk, args.concurrency, args.persist, total, out)
+            total += len(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{total} queries in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f}/s), {failed} failed",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_classifier.py
+"""Per-query cost of keyword classification as the keyword set grows.
+
+Compares the compiled QueryClassifier against the previous approach of one
+`k in query_lower` scan per keyword.
+
+    python -m benchmarks.bench_classifier
+"""
+import random
+import string
+import time
+from services.query_classifier import QueryClassifier
+
+QUERIES = [
+    "I've been feeling anxious about work and it's affecting my sleep",
+    "Since the accident I keep having flashbacks, is this trauma or ptsd?",
+    "Sometimes I think about how to end my life and I don't know who to talk to",
+    "How can I build better habits and stop procrastinating every evening?",
+]
+
+
+def make_keywords(count: int, rng: random.Random):
+    words = set()
+    while len(words) < count:
+        length = rng.randint(4, 12)
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+        if rng.random() < 0.3:
+            word += " " + "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+        words.add(word)
+    return sorted(words)
+
+
+def naive_classify(categories, query: str):
+    query_lower = query.lower()
+    for name, spec in categories.items():
+        if any(k in query_lower for k in spec["keywords"]):
+            return name
+    return "general"
+
+
+def time_per_query(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES))
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'keywords':>9} {'build ms':>9} {'compiled us':>12} {'naive us':>10} {'speedup':>8}")
+    for count in (12, 100, 1_000, 10_000, 50_000):
+        keywords = make_keywords(count, rng)
+        # Real keywords stay in so every query exercises a hit path
+        categories = {
+            "crisis": {"reason": "crisis", "keywords": keywords[: count // 2] + ["end my life"]},
+            "complex": {"reason": "complex", "keywords": keywords[count // 2:] + ["trauma", "ptsd"]},
+        }
+
+        start = time.perf_counter()
+        classifier = QueryClassifier(categories)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        repeat = max(10, 20_000 // count)
+        compiled = time_per_query(classifier.classify, repeat) * 1e6
+        naive = time_per_query(lambda q: naive_classify(categories, q), repeat) * 1e6
+        print(f"{count:>9} {build_ms:>9.1f} {compiled:>12.2f} {naive:>10.2f} {naive / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_sanitizer.py
+"""Cost of stripping reasoning from model output as responses grow.
+
+Compares the StreamSanitizer, both fed token by token and over the whole
+text, against the previous approach: one DOTALL regex of lazy alternations
+plus a whitespace regex over the complete response. "held" is the most
+text the stream sanitizer ever had buffered.
+
+    python -m benchmarks.bench_sanitizer
+"""
+import random
+import re
+import time
+from services.sanitizer import StreamSanitizer, sanitize
+
+_PREVIOUS = re.compile(
+    r'(Let me think.*?\n|First, I.*?\n|Based on my analysis.*?\n|I need to consider.*?\n|My reasoning is.*?\n|\[REASONING:.*?\]|\[MODEL SELECTION:.*?\]|<thinking>.*?</thinking>|<analysis>.*?</analysis>)',
+    re.IGNORECASE | re.DOTALL
+)
+WORDS = "you are not alone feeling anxious before exams is common try slow breathing and short walks".split()
+
+
+def previous_clean(response: str) -> str:
+    response = _PREVIOUS.sub('', response)
+    return re.sub(r'\n\s*\n', '\n\n', response.strip())
+
+
+def make_response(words: int, rng: random.Random) -> str:
+    """deepseek-r1 style output - a reasoning block, then paragraphs with the odd marker"""
+    thinking = " ".join(rng.choice(WORDS) for _ in range(words // 2))
+    paragraphs = []
+    for _ in range(max(1, words // 60)):
+        paragraphs.append(" ".join(rng.choice(WORDS) for _ in range(60)))
+        if rng.random() < 0.2:
+            paragraphs.append("[REASONING: " + " ".join(rng.choice(WORDS) for _ in range(10)) + "]")
+    return f"<thinking>\n{thinking}\n</thinking>\n\nLet me think about this.\n" + "\n\n\n".join(paragraphs)
+
+
+def tokens(text: str, rng: random.Random):
+    i = 0
+    while i < len(text):
+        n = rng.randint(2, 8)
+        yield text[i:i + n]
+        i += n
+
+
+def time_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'words':>7} {'previous us':>12} {'whole us':>9} {'stream us':>10} {'held':>5}")
+    for words in (200, 1_000, 5_000, 20_000):
+        text = make_response(words, rng)
+        chunks = list(tokens(text, rng))
+        repeat = max(3, 20_000 // words)
+
+        def stream():
+            sanitizer = StreamSanitizer()
+            held = 0
+            for chunk in chunks:
+                sanitizer.feed(chunk)
+                held = max(held, len(sanitizer._held))
+            sanitizer.flush()
+            return held
+
+        print(f"{words:>7} {time_us(lambda: previous_clean(text), repeat):>12.0f} "
+              f"{time_us(lambda: sanitize(text), repeat):>9.0f} {time_us(stream, repeat):>10.0f} {stream():>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/load_test.py
+"""Offline load test for /api/v1/psychology/chat.
+
+Starts the provider stubs and the FastAPI app (uvicorn, in-process), then
+drives concurrent chat traffic and reports throughput plus p50/p95/p99 of
+total latency and time-to-first-token.
+
+    python -m benchmarks.load_test --requests 200 --concurrency 20
+    python -m benchmarks.load_test --mode chat --groq-ttft 0.8 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+import aiohttp
+from benchmarks.stubs import LatencyProfile, ProviderStubs
+
+QUERIES = [
+    "I've been feeling anxious about work and it's affecting my sleep",
+    "How can I manage stress better during exams?",
+    "I'm having trouble with relationships and feel lonely",
+    "I keep procrastinating and feel guilty about it",
+    "Since the accident I have flashbacks, could this be trauma?",
+    "I feel low most mornings and can't find motivation",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+async def one_request(session: aiohttp.ClientSession, base_url: str, mode: str, i: int) -> Dict:
+    payload = {"query": f"{QUERIES[i % len(QUERIES)]} (case {i})", "user_id": f"bench-{i}"}
+    started = time.perf_counter()
+    ttft = None
+    ok = False
+
+    if mode == "stream":
+        async with session.post(f"{base_url}/api/v1/psychology/chat/stream", json=payload) as response:
+            async for line in response.content:
+                if ttft is None and line.startswith(b"event: token"):
+                    ttft = time.perf_counter() - started
+                if line.startswith(b"event: done"):
+                    ok = True
+    else:
+        async with session.post(f"{base_url}/api/v1/psychology/chat", json=payload) as response:
+            data = await response.json()
+            ok = response.status == 200 and data.get("model_used") != "error"
+
+    return {"ok": ok, "latency": time.perf_counter() - started, "ttft": ttft}
+
+
+async def drive(base_url: str, mode: str, total: int, concurrency: int, offset: int = 0) -> List[Dict]:
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def bounded(i: int) -> Dict:
+            async with semaphore:
+                try:
+                    return await one_request(session, base_url, mode, offset + i)
+                except Exception as e:
+                    return {"ok": False, "latency": None, "ttft": None, "error": str(e)}
+
+        return await asyncio.gather(*(bounded(i) for i in range(total)))
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    latencies = [r["latency"] for r in results if r["ok"]]
+    ttfts = [r["ttft"] for r in results if r["ok"] and r["ttft"] is not None]
+
+    def pcts(values):
+        return {f"p{p}": round(percentile(values, p), 4) if values else None for p in (50, 95, 99)}
+
+    return {
+        "requests": len(results),
+        "errors": sum(1 for r in results if not r["ok"]),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_s": pcts(latencies),
+        "ttft_s": pcts(ttfts),
+    }
+
+
+async def start_api(stubs: ProviderStubs, env: Dict[str, str]):
+    """Run the FastAPI app in-process against the stubs - returns (server, task, base_url)"""
+    # Config reads the environment at import, so the app is imported afterwards
+    os.environ.update(stubs.env())
+    os.environ.update({
+        "VIDEO_INDEX_PATH": os.path.join(tempfile.mkdtemp(), "videos.json"),
+        "VIDEO_INDEX_REFRESH_INTERVAL": "0",
+        **env
+    })
+    import uvicorn
+    import main as app_module
+
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=0, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, server_task, f"http://127.0.0.1:{port}"
+
+
+async def main(args):
+    stubs = ProviderStubs({
+        "groq": LatencyProfile(args.groq_ttft, args.ttft_sigma, args.groq_tps, args.tokens, args.error_rate),
+        "openai": LatencyProfile(args.openai_ttft, args.ttft_sigma, args.openai_tps, args.tokens, args.error_rate),
+    }, youtube_latency=args.youtube_latency, seed=args.seed)
+    await stubs.start()
+
+    server, server_task, base_url = await start_api(stubs, {
+        "RESPONSE_CACHE_SIZE": "500" if args.response_cache else "0",
+        "HEDGE_ENABLED": "true" if args.hedge else "false",
+    })
+
+    try:
+        if args.warmup:
+            await drive(base_url, args.mode, args.warmup, args.concurrency, offset=10**6)
+
+        started = time.perf_counter()
+        results = await drive(base_url, args.mode, args.requests, args.concurrency)
+        report = summarize(results, time.perf_counter() - started)
+        report.update({"mode": args.mode, "concurrency": args.concurrency, "stub_requests": stubs.requests})
+    finally:
+        server.should_exit = True
+        await server_task
+        await stubs.stop()
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["stream", "chat"], default="stream")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per stub completion")
+    parser.add_argument("--groq-ttft", type=float, default=0.3, help="Median TTFT seconds")
+    parser.add_argument("--openai-ttft", type=float, default=0.5)
+    parser.add_argument("--ttft-sigma", type=float, default=0.4, help="Lognormal sigma of TTFT")
+    parser.add_argument("--groq-tps", type=float, default=400.0)
+    parser.add_argument("--openai-tps", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--youtube-latency", type=float, default=0.15)
+    parser.add_argument("--response-cache", action="store_true", help="Leave the response cache enabled")
+    parser.add_argument("--hedge", action="store_true", help="Enable hedged requests")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,218 @@
+# benchmarks/simulate_updates.py
+"""Drive the Telegram bot's webhook listener with simulated updates.
+
+Runs everything offline and in-process: the provider stubs, the API, a stub
+Bot API server and the bot in webhook mode. Simulated message updates from
+many chats are POSTed to the webhook. The report covers webhook ack
+latency, time until each reply's first text appears, Bot API calls per
+method, and whether any chat's replies interleaved.
+
+    python -m benchmarks.simulate_updates --chats 50 --messages-per-chat 3
+    python -m benchmarks.simulate_updates --transport embedded
+"""
+import argparse
+import asyncio
+import json
+import socket
+import time
+from typing import Dict, List
+import aiohttp
+from aiohttp import web
+from benchmarks.load_test import QUERIES, percentile, start_api
+from benchmarks.stubs import LatencyProfile, ProviderStubs
+
+BOT_TOKEN = "123456:SIMULATED"
+WEBHOOK_SECRET = "simulated-secret"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BotApiStub:
+    """Minimal Bot API - acknowledges calls and records message activity per chat"""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.sends: Dict[int, List[float]] = {}  # chat_id -> sendMessage times
+        self.touched: Dict[int, List[int]] = {}  # chat_id -> message ids sent or edited, in order
+        self._next_id = 1000
+        self._runner = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = dict(await request.post()) if request.body_exists else {}
+        if request.content_type == "application/json":
+            params = await request.json()
+
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "PsychoHealer", "username": "psychohealer_bot"}
+        elif method in ("sendMessage", "editMessageText"):
+            chat_id = int(params["chat_id"])
+            if method == "sendMessage":
+                self._next_id += 1
+                message_id = self._next_id
+                self.sends.setdefault(chat_id, []).append(time.perf_counter())
+            else:
+                message_id = int(params["message_id"])
+            self.touched.setdefault(chat_id, []).append(message_id)
+            result = {
+                "message_id": message_id, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")
+            }
+        else:
+            # setWebhook, deleteWebhook, setMyCommands, sendChatAction, ...
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def interleaved_chats(self) -> int:
+        """Chats where an older reply was edited after a newer one was started"""
+        return sum(1 for ids in self.touched.values() if ids != sorted(ids))
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> Dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": text,
+            "chat": {"id": chat_id, "type": "private"}, "from": user
+        }
+    }
+
+
+async def simulate(args):
+    stubs = ProviderStubs({
+        "groq": LatencyProfile(args.groq_ttft, 0.4, 400.0, args.tokens),
+        "openai": LatencyProfile(0.5, 0.4, 150.0, args.tokens),
+    })
+    await stubs.start()
+    bot_api = BotApiStub()
+    await bot_api.start()
+    webhook_port = free_port()
+
+    server, server_task, api_url = await start_api(stubs, {
+        "RESPONSE_CACHE_SIZE": "0",
+        "USER_RATE_LIMIT_BURST": str(args.messages_per_chat),
+        "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+        "TELEGRAM_API_BASE_URL": bot_api.base_url,
+        "TELEGRAM_CONCURRENT_UPDATES": str(args.workers),
+        "TELEGRAM_TRANSPORT": args.transport,
+    })
+    from telegram_bot import PsychoBot
+
+    bot = PsychoBot(api_base_url=api_url)
+    app = bot.build_application()
+    await app.initialize()
+    await app.post_init(app)
+    await app.updater.start_webhook(
+        listen="127.0.0.1", port=webhook_port, url_path="telegram",
+        webhook_url=f"http://127.0.0.1:{webhook_port}/telegram", secret_token=WEBHOOK_SECRET
+    )
+    await app.start()
+
+    posted: Dict[int, List[float]] = {}
+    acks: List[float] = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            async def post(update_id: int, chat_id: int, text: str):
+                posted.setdefault(chat_id, []).append(time.perf_counter())
+                started = time.perf_counter()
+                async with session.post(
+                    f"http://127.0.0.1:{webhook_port}/telegram",
+                    json=make_update(update_id, chat_id, text),
+                    headers={"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET}
+                ) as response:
+                    response.raise_for_status()
+                acks.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            update_id = 0
+            # Each chat sends its messages back to back; chats are interleaved
+            for round_no in range(args.messages_per_chat):
+                for chat_id in range(1, args.chats + 1):
+                    update_id += 1
+                    await post(update_id, chat_id, QUERIES[update_id % len(QUERIES)])
+                    if args.rate:
+                        await asyncio.sleep(1 / args.rate)
+
+            expected = args.chats * args.messages_per_chat
+            deadline = time.perf_counter() + args.timeout
+            while sum(len(v) for v in bot_api.sends.values()) < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            # Let final edits land
+            await asyncio.sleep(args.settle)
+            elapsed = time.perf_counter() - started
+    finally:
+        await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+        await app.post_shutdown(app)
+        server.should_exit = True
+        await server_task
+        await bot_api.stop()
+        await stubs.stop()
+
+    first_text = [
+        sent - post_time
+        for chat_id, post_times in posted.items()
+        for post_time, sent in zip(post_times, bot_api.sends.get(chat_id, []))
+    ]
+
+    def pcts(values):
+        return {f"p{p}": round(percentile(values, p), 4) if values else None for p in (50, 95, 99)}
+
+    return {
+        "updates": sum(len(v) for v in posted.values()),
+        "replies_started": sum(len(v) for v in bot_api.sends.values()),
+        "elapsed_s": round(elapsed, 3),
+        "webhook_ack_s": pcts(acks),
+        "first_text_s": pcts(first_text),
+        "interleaved_chats": bot_api.interleaved_chats(),
+        "transport": args.transport,
+        "bot_api_calls": bot_api.calls,
+        "stub_requests": stubs.requests,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=30)
+    parser.add_argument("--messages-per-chat", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=32, help="TELEGRAM_CONCURRENT_UPDATES")
+    parser.add_argument("--transport", choices=["http", "embedded"], default="http",
+                        help="Bot -> API over loopback HTTP or in-process")
+    parser.add_argument("--rate", type=float, default=0, help="Updates per second (0 = as fast as possible)")
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per stub completion")
+    parser.add_argument("--groq-ttft", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait for final edits")
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(simulate(args))
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
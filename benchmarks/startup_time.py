@@ -0,0 +1,173 @@
+# benchmarks/startup_time.py
+"""Cold-start cost of the API process.
+
+Each run uses a fresh interpreter. Three things are measured:
+- the import cost of `main` (via -X importtime), with the heaviest modules
+  and any provider SDKs that were loaded at import;
+- the time until a uvicorn process answers /health;
+- the latency of the first and second chat requests against the offline
+  provider stubs.
+
+    python -m benchmarks.startup_time --runs 5
+    python -m benchmarks.startup_time --idle 2 --json startup.json
+    python -m benchmarks.startup_time --no-warm-up
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import aiohttp
+from benchmarks.stubs import LatencyProfile, ProviderStubs
+from benchmarks.simulate_updates import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that should only load on first use
+LAZY_MODULES = ("groq", "openai", "googleapiclient", "aiohttp")
+
+
+def measure_import(env: Dict[str, str]) -> Dict:
+    """One `import main` in a fresh interpreter - total, top modules and eagerly loaded SDKs"""
+    code = (
+        "import json, sys, main; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        modules.append((name, int(cumulative_us) / 1e6))
+    total = next((seconds for name, seconds in modules if name == "main"), 0.0)
+    top_level = sorted(((n, s) for n, s in modules if n != "main" and "." not in n), key=lambda m: -m[1])
+    return {
+        "wall_s": wall,
+        "import_main_s": total,
+        "top_modules": top_level,
+        "eager_sdks": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+async def measure_serving(env: Dict[str, str], timeout: float, idle: float) -> Dict:
+    """Start uvicorn, wait for /health, then time two chat requests"""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            ready = None
+            while ready is None:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"API exited during startup with code {proc.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("API did not become ready in time")
+                try:
+                    async with session.get(f"{base_url}/health") as response:
+                        if response.status == 200:
+                            ready = time.perf_counter() - started
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.02)
+
+            # Time a real deployment has between readiness and first traffic
+            await asyncio.sleep(idle)
+            chats = []
+            for n in range(2):
+                chat_started = time.perf_counter()
+                async with session.post(f"{base_url}/api/v1/psychology/chat", json={
+                    "query": f"I can't sleep before exams, what helps? ({n})", "user_id": f"startup-{n}"
+                }) as response:
+                    response.raise_for_status()
+                    await response.read()
+                chats.append(time.perf_counter() - chat_started)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {"ready_s": ready, "first_chat_s": chats[0], "second_chat_s": chats[1]}
+
+
+async def run(args) -> Dict:
+    stubs = ProviderStubs({
+        "groq": LatencyProfile(0.05, 0.1, 2000.0, 50),
+        "openai": LatencyProfile(0.05, 0.1, 2000.0, 50),
+    }, youtube_latency=0.01)
+    await stubs.start()
+    env = {
+        **os.environ,
+        **stubs.env(),
+        "VIDEO_INDEX_PATH": os.path.join(tempfile.mkdtemp(), "videos.json"),
+        "VIDEO_INDEX_REFRESH_INTERVAL": "0",
+        "RESPONSE_CACHE_SIZE": "0",
+        "PROVIDER_WARM_UP": "false" if args.no_warm_up else "true",
+    }
+
+    imports: List[Dict] = []
+    serving: List[Dict] = []
+    try:
+        for _ in range(args.runs):
+            imports.append(await asyncio.to_thread(measure_import, env))
+        for _ in range(args.serve_runs):
+            serving.append(await measure_serving(env, args.timeout, args.idle))
+    finally:
+        await stubs.stop()
+
+    def median(rows: List[Dict], key: str):
+        return round(statistics.median(row[key] for row in rows), 4) if rows else None
+
+    top: Dict[str, List[float]] = {}
+    for row in imports:
+        for name, seconds in row["top_modules"][:args.top]:
+            top.setdefault(name, []).append(seconds)
+    return {
+        "runs": args.runs,
+        "import_main_s": median(imports, "import_main_s"),
+        "interpreter_wall_s": median(imports, "wall_s"),
+        "eager_sdks": sorted({m for row in imports for m in row["eager_sdks"]}),
+        "top_modules_s": {
+            name: round(statistics.median(values), 4)
+            for name, values in sorted(top.items(), key=lambda kv: -statistics.median(kv[1]))[:args.top]
+        },
+        "provider_warm_up": not args.no_warm_up,
+        "idle_s": args.idle,
+        "ready_s": median(serving, "ready_s"),
+        "first_chat_s": median(serving, "first_chat_s"),
+        "second_chat_s": median(serving, "second_chat_s"),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh-interpreter import measurements")
+    parser.add_argument("--serve-runs", type=int, default=3, help="uvicorn cold starts (0 to skip)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest top-level modules to report")
+    parser.add_argument("--no-warm-up", action="store_true", help="PROVIDER_WARM_UP=false")
+    parser.add_argument("--idle", type=float, default=0, help="Seconds between ready and the first chat")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,141 @@
+# benchmarks/stubs.py
+"""Local stand-ins for the Groq, OpenAI and YouTube APIs.
+
+One aiohttp server answers:
+  POST /groq/openai/v1/chat/completions   (GROQ_BASE_URL=<base>/groq)
+  POST /openai/v1/chat/completions        (OPENAI_BASE_URL=<base>/openai/v1)
+  GET  /youtube/v3/search                 (YOUTUBE_API_ENDPOINT=<base>/)
+
+Latencies are drawn from seeded distributions so runs are repeatable.
+"""
+import asyncio
+import json
+import random
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+from aiohttp import web
+
+_WORDS = (
+    "Your problem indicates stress related to workload . Try a short breathing "
+    "exercise , keep a sleep schedule , and write down worries before bed . "
+    "**Action**: practice grounding , talk to someone you trust , and plan breaks ."
+).split()
+
+
+@dataclass
+class LatencyProfile:
+    """Lognormal time-to-first-token plus a steady token rate"""
+    ttft_median: float = 0.3
+    ttft_sigma: float = 0.4
+    tokens_per_sec: float = 300.0
+    tokens: int = 200
+    error_rate: float = 0.0
+
+    def sample_ttft(self, rng: random.Random) -> float:
+        return self.ttft_median * rng.lognormvariate(0, self.ttft_sigma)
+
+
+class ProviderStubs:
+    def __init__(self, profiles: Dict[str, LatencyProfile], youtube_latency: float = 0.15, seed: int = 7):
+        self.profiles = profiles
+        self.youtube_latency = youtube_latency
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/groq/openai/v1/chat/completions", self._chat("groq"))
+        app.router.add_post("/openai/v1/chat/completions", self._chat("openai"))
+        app.router.add_get("/youtube/v3/search", self._youtube_search)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points the app at these stubs"""
+        return {
+            "GROQ_API_KEY": "stub",
+            "OPENAI_API_KEY": "stub",
+            "YOUTUBE_API_KEY": "stub",
+            "GROQ_BASE_URL": f"{self.base_url}/groq",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "YOUTUBE_API_ENDPOINT": f"{self.base_url}/",
+        }
+
+    def _chat(self, provider: str):
+        profile = self.profiles[provider]
+
+        async def handler(request: web.Request) -> web.StreamResponse:
+            self.requests[provider] = self.requests.get(provider, 0) + 1
+            body = await request.json()
+            ttft = profile.sample_ttft(self.rng)
+            failed = self.rng.random() < profile.error_rate
+            words = [self.rng.choice(_WORDS) for _ in range(profile.tokens)]
+            await asyncio.sleep(ttft)
+
+            if failed:
+                return web.json_response({"error": {"message": "stub overload"}}, status=503)
+
+            if not body.get("stream"):
+                await asyncio.sleep(profile.tokens / profile.tokens_per_sec)
+                return web.json_response(_completion(body["model"], " ".join(words)))
+
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            interval = 1.0 / profile.tokens_per_sec
+            started = time.perf_counter()
+            for i, word in enumerate(words):
+                # Line breaks every ~12 tokens, like real paragraphed answers
+                text = word + ("\n" if i % 12 == 11 else " ")
+                await response.write(f"data: {json.dumps(_chunk(body['model'], text))}\n\n".encode())
+                # Sleep against the schedule, not per token, so timer overhead doesn't accumulate
+                delay = started + (i + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+
+        return handler
+
+    async def _youtube_search(self, request: web.Request) -> web.Response:
+        self.requests["youtube"] = self.requests.get("youtube", 0) + 1
+        await asyncio.sleep(self.youtube_latency)
+        query = request.query.get("q", "")
+        count = int(request.query.get("maxResults", 4))
+        items = [{
+            "id": {"videoId": f"stub{zlib.crc32(f'{query}:{i}'.encode()):08x}"},
+            "snippet": {
+                "title": f"Coping video {i + 1} for {query[:40]}",
+                "description": "A calm guided session with practical coping techniques.",
+                "channelTitle": "Stub Therapy Channel"
+            }
+        } for i in range(count)]
+        return web.json_response({"items": items})
+
+
+def _completion(model: str, text: str) -> Dict:
+    return {
+        "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+def _chunk(model: str, text: str) -> Dict:
+    return {
+        "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]
+    }
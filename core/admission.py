@@ -0,0 +1,165 @@
+# core/admission.py
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+from core.config import Config
+from core.metrics import metrics, labels
+
+
+class AdmissionRejected(Exception):
+    """Request turned away - status is 429 (user over limit) or 503 (server full)"""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+        super().__init__(detail)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets, least recently seen keys evicted past max_keys"""
+
+    def __init__(self, rate_per_sec: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def try_acquire(self, key: str) -> Optional[float]:
+        """Take a token - returns None if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+
+        tokens, updated = bucket
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return None
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+
+class Ticket:
+    """Admission slot - release is idempotent so every exit path can call it"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, time-limited wait queue.
+
+    Up to max_concurrent requests run; up to max_queue more wait at most
+    queue_timeout seconds for a slot. Anything beyond that is rejected
+    immediately with a Retry-After estimate, so admitted requests keep a
+    bounded latency instead of every request slowing down together.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 user_limiter: Optional[TokenBucketLimiter] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.user_limiter = user_limiter
+        self.active = 0
+        self._waiters: deque = deque()
+        self._service_time = 1.0  # EWMA seconds per admitted request
+        self.rejections = metrics.counter(
+            "psychohealer_admission_rejections_total", "Requests rejected by admission control"
+        )
+        self.admitted = metrics.counter(
+            "psychohealer_admission_admitted_total", "Requests admitted by admission control"
+        )
+        metrics.gauge(
+            "psychohealer_admission_slots", "Active and queued chat requests",
+            lambda: {labels(state="active"): self.active, labels(state="queued"): self.queued}
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.done())
+
+    def _retry_after(self) -> int:
+        backlog = self.queued + self.active
+        return max(1, math.ceil(self._service_time * backlog / self.max_concurrent))
+
+    def check_rate(self, key: str):
+        """Take a token from the key's bucket - raises 429 when it is empty"""
+        if self.user_limiter:
+            wait = self.user_limiter.try_acquire(key)
+            if wait is not None:
+                self.rejections.inc(reason="user_rate_limit")
+                raise AdmissionRejected(429, max(1, math.ceil(wait)), "Too many requests for this user")
+
+    async def admit(self, user_id: Optional[str]) -> Ticket:
+        """Rate-limit the user, then take or wait for a slot - None skips the rate limit"""
+        if user_id is not None:
+            self.check_rate(user_id)
+
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+        else:
+            if self.queued >= self.max_queue:
+                self.rejections.inc(reason="queue_full")
+                raise AdmissionRejected(503, self._retry_after(), "Server busy - queue full")
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # A released slot is handed to the waiter directly; active is unchanged
+                await asyncio.wait_for(waiter, self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejections.inc(reason="queue_timeout")
+                raise AdmissionRejected(503, self._retry_after(), "Server busy - timed out waiting")
+            except asyncio.CancelledError:
+                # Cancelled after a slot was handed over - pass it on rather than leak it
+                if waiter.done() and not waiter.cancelled():
+                    self._release(0.0)
+                raise
+
+        self.admitted.inc()
+        return Ticket(self)
+
+    def _release(self, service_seconds: float):
+        self._service_time = 0.8 * self._service_time + 0.2 * service_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "service_time_ewma": round(self._service_time, 3)
+        }
+
+
+def create_admission_controller(config: Config = None) -> AdmissionController:
+    """Controller sized by the ADMISSION_* and USER_RATE_LIMIT_* settings"""
+    config = config or Config()
+    return AdmissionController(
+        config.ADMISSION_MAX_CONCURRENT,
+        config.ADMISSION_MAX_QUEUE,
+        config.ADMISSION_QUEUE_TIMEOUT,
+        TokenBucketLimiter(config.USER_RATE_LIMIT_PER_MINUTE / 60.0, config.USER_RATE_LIMIT_BURST)
+    )
@@ -10,6 +10,11 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     TELEGRAM_BOT_KEY = os.getenv("TELEGRAM_BOT_TOKEN")
     API_BASE_URL = os.getenv("API_BASE_URL")
+
+    # Provider endpoint overrides - unset uses the SDK defaults (benchmarks point these at local stubs)
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+    YOUTUBE_API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")
     
     # Model configurations
     MODELS = {
@@ -19,10 +24,145 @@ class Config:
     }
     
     DEFAULT_MODEL = "llama"
+    CLASSIFIER_KEYWORDS_PATH = os.getenv(
+        "CLASSIFIER_KEYWORDS_PATH",
+        os.path.join(os.path.dirname(__file__), "keywords.json")
+    )
     MAX_TOKENS = 1500  # Reduced from 2000 for faster response
     TEMPERATURE = 0.5  # Reduced from 0.7 for more consistent/faster responses
+
+    # Prompt input budget (estimated tokens) - system prompt + context + query
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2000"))
+    QUERY_TOKEN_LIMIT = int(os.getenv("QUERY_TOKEN_LIMIT", "600"))
     
     # Performance optimizations
     CACHE_SIZE = 100
     MAX_VIDEOS = 4
-    THREAD_POOL_SIZE = 3
\ No newline at end of file
+    YOUTUBE_CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", "21600"))
+    YOUTUBE_NEGATIVE_CACHE_TTL = float(os.getenv("YOUTUBE_NEGATIVE_CACHE_TTL", "300"))
+
+    # Offline therapeutic video index - live search is only a fallback
+    VIDEO_INDEX_PATH = os.getenv("VIDEO_INDEX_PATH", "data/therapeutic_videos.json")
+    VIDEO_INDEX_REFRESH_INTERVAL = float(os.getenv("VIDEO_INDEX_REFRESH_INTERVAL", "86400"))  # 0 disables
+    VIDEO_INDEX_LIVE_FALLBACK = os.getenv("VIDEO_INDEX_LIVE_FALLBACK", "true").lower() == "true"
+    VIDEO_INDEX_TOPICS = [
+        "anxiety coping strategies therapy",
+        "depression self help psychology",
+        "cognitive behavioral therapy techniques",
+        "mindfulness meditation for stress",
+        "insomnia sleep hygiene psychology",
+        "panic attack breathing exercise",
+        "grief and loss coping",
+        "trauma ptsd healing therapy",
+        "relationship communication skills therapy",
+        "self esteem confidence psychology",
+        "anger management techniques",
+        "addiction recovery support",
+        "work stress burnout recovery",
+        "loneliness social anxiety help",
+        "bipolar disorder explained",
+        "ocd treatment explained",
+    ]
+    THREAD_POOL_SIZE = 3  # Memory/context operations only
+    # Write-behind conversation persistence - flushed by size or interval, drained on shutdown
+    PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "50"))
+    PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.5"))
+    PERSIST_DRAIN_TIMEOUT = float(os.getenv("PERSIST_DRAIN_TIMEOUT", "10"))
+
+    # Cross-worker state - "memory" (per process), "sqlite" (workers on one host) or "redis"
+    SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory")
+    SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "psychohealer_state.db")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")  # Any Redis-protocol server
+    SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "psychohealer:")
+    SHARED_STATE_MAX_ENTRIES = 10000  # Keys kept by the in-process backend
+
+    # Conversation storage - "memory" (per process), "sqlite" (shared by workers) or
+    # "shared" (the shared state backend); follows SHARED_STATE_BACKEND unless set
+    CHAT_STORE_BACKEND = os.getenv("CHAT_STORE_BACKEND") or ("memory" if SHARED_STATE_BACKEND == "memory" else "shared")
+    CHAT_STORE_PATH = os.getenv("CHAT_STORE_PATH", "psychohealer_chat.db")
+    MAX_HISTORY_PER_USER = int(os.getenv("MAX_HISTORY_PER_USER", "50"))
+    MAX_USERS_IN_MEMORY = int(os.getenv("MAX_USERS_IN_MEMORY", "10000"))
+    HISTORY_MAX_PAGE_SIZE = 100
+
+    # Rolling per-user summary used as model context
+    SUMMARY_RECENT_SESSIONS = 3  # Kept with topic and guidance
+    SUMMARY_EARLIER_SESSIONS = 5  # Kept as one-line topics
+    SUMMARY_MAX_THEMES = 8
+
+    # Response cache - full answers for repeated queries under the same context
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+    # LLM provider concurrency - async clients, not bounded by THREAD_POOL_SIZE
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "32"))
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    # Import provider SDKs in the background at startup instead of on the first request
+    PROVIDER_WARM_UP = os.getenv("PROVIDER_WARM_UP", "true").lower() == "true"
+
+    # Model routing - failover order, deadlines, hedging and circuit breakers
+    MODEL_FALLBACKS = {
+        "llama": ["deepseek", "openai"],
+        "deepseek": ["llama", "openai"],
+        "openai": ["llama", "deepseek"]
+    }
+    MODEL_FIRST_TOKEN_TIMEOUT = float(os.getenv("MODEL_FIRST_TOKEN_TIMEOUT", "15"))
+    MODEL_STREAM_IDLE_TIMEOUT = float(os.getenv("MODEL_STREAM_IDLE_TIMEOUT", "20"))
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_DEFAULT_DELAY = 3.0  # Seconds before hedging until enough TTFT samples exist
+    HEDGE_MIN_SAMPLES = 20
+    # Adaptive selection for general queries
+    MODEL_STATS_ALPHA = 0.2  # EWMA weight of the newest sample
+    MODEL_UNHEALTHY_ERROR_RATE = 0.5
+    ADAPTIVE_LOAD_THRESHOLD = int(os.getenv("ADAPTIVE_LOAD_THRESHOLD", "8"))  # Concurrent streams
+    ADAPTIVE_EXPECTED_TOKENS = 600  # Typical response length used to rank models
+
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_TIMEOUT = 30.0
+
+    # Shared HTTP connection pool for provider clients
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+    # Admission control - bounded in-flight chats plus a short wait queue
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "48"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "96"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))  # Seconds before 503
+    # Per-user token bucket - sustained rate and burst allowance
+    USER_RATE_LIMIT_PER_MINUTE = float(os.getenv("USER_RATE_LIMIT_PER_MINUTE", "20"))
+    USER_RATE_LIMIT_BURST = int(os.getenv("USER_RATE_LIMIT_BURST", "5"))
+
+    # Batch endpoint - items per request and items processed at once
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+    # Telegram bot - streamed replies are edited in place, throttled to Telegram's rate limits
+    TELEGRAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.2"))  # Seconds between edits
+    TELEGRAM_TYPING_INTERVAL = 4.5  # Typing action lasts ~5 s, refreshed until text appears
+    TELEGRAM_STREAM_IDLE_TIMEOUT = float(os.getenv("TELEGRAM_STREAM_IDLE_TIMEOUT", "30"))
+    TELEGRAM_MESSAGE_LIMIT = 4096
+    # Concurrent update handling - one update at a time per chat
+    TELEGRAM_CONCURRENT_UPDATES = int(os.getenv("TELEGRAM_CONCURRENT_UPDATES", "32"))
+    TELEGRAM_MAX_PENDING_UPDATES = int(os.getenv("TELEGRAM_MAX_PENDING_UPDATES", "512"))
+    # Backpressure when the API answers 503 - wait out Retry-After up to this budget
+    TELEGRAM_API_RETRIES = 2
+    TELEGRAM_MAX_RETRY_WAIT = float(os.getenv("TELEGRAM_MAX_RETRY_WAIT", "15"))
+    # Update delivery - "polling" or "webhook" (needs a public HTTPS URL in front of the listener)
+    TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling")
+    TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    TELEGRAM_WEBHOOK_LISTEN = os.getenv("TELEGRAM_WEBHOOK_LISTEN", "0.0.0.0")
+    TELEGRAM_WEBHOOK_PORT = int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+    TELEGRAM_WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "telegram")
+    TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+    TELEGRAM_WEBHOOK_MAX_CONNECTIONS = int(os.getenv("TELEGRAM_WEBHOOK_MAX_CONNECTIONS", "40"))
+    TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL")  # Unset uses api.telegram.org
+    # Bot -> PsychoHealer API - "http" (separate API process) or "embedded" (same process and loop)
+    TELEGRAM_TRANSPORT = os.getenv("TELEGRAM_TRANSPORT", "http")
+    TELEGRAM_EMBEDDED_SERVE_API = os.getenv("TELEGRAM_EMBEDDED_SERVE_API", "false").lower() == "true"
+    TELEGRAM_EMBEDDED_API_HOST = os.getenv("TELEGRAM_EMBEDDED_API_HOST", "0.0.0.0")
+    TELEGRAM_EMBEDDED_API_PORT = int(os.getenv("TELEGRAM_EMBEDDED_API_PORT", "8000"))
+    # Bot -> PsychoHealer API connection pool (http transport)
+    BOT_HTTP_MAX_CONNECTIONS = int(os.getenv("BOT_HTTP_MAX_CONNECTIONS", "64"))
+    BOT_HTTP_DNS_CACHE_TTL = 300
+    BOT_HTTP_KEEPALIVE_TIMEOUT = 30.0
@@ -0,0 +1,159 @@
+# core/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple, Union
+
+LabelKey = Tuple[Tuple[str, str], ...]
+GaugeValue = Union[float, Dict[LabelKey, float]]
+
+# Seconds - covers sub-ms cache hits through multi-second generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}")
+                cumulative += series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge read at scrape time - callback returns a value or {label_key: value}"""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], GaugeValue]):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.callback()
+        except Exception:
+            return lines
+        series = value if isinstance(value, dict) else {(): value}
+        for key, v in series.items():
+            if v is not None:
+                lines.append(f"{self.name}{_format_labels(key)} {float(v)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], GaugeValue]) -> CallbackGauge:
+        """Register (or replace) a scrape-time gauge"""
+        gauge = self._metrics[name] = CallbackGauge(name, help_text, callback)
+        return gauge
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def labels(**values) -> LabelKey:
+    """Label key for CallbackGauge dict values"""
+    return _label_key(values)
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "psychohealer_stage_seconds", "Time spent per stage of a chat request"
+)
+TTFT_SECONDS = metrics.histogram(
+    "psychohealer_model_ttft_seconds", "Time to first token per model"
+)
+MODEL_TOKENS = metrics.counter(
+    "psychohealer_model_tokens_total", "Streamed completion chunks (~tokens) per model"
+)
+MODEL_GENERATION_SECONDS = metrics.counter(
+    "psychohealer_model_generation_seconds_total", "Seconds between first and last token per model"
+)
+SANITIZER_REMOVED_CHARS = metrics.counter(
+    "psychohealer_sanitizer_removed_chars_total", "Reasoning characters stripped from responses per model"
+)
+SANITIZER_UNCLOSED = metrics.counter(
+    "psychohealer_sanitizer_unclosed_total", "Responses that ended inside an unclosed reasoning block per model"
+)
@@ -0,0 +1,345 @@
+# core/shared_state.py
+"""Key/value state shared by every uvicorn worker.
+
+"memory" keeps state in this process. "sqlite" uses a WAL database file that
+all workers on the host open. "redis" talks to any Redis-protocol server
+(Redis, Valkey, KeyDB, Dragonfly) and needs the optional `redis` package.
+Values are JSON, so readers always get their own copy.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+from core.config import Config
+
+Updater = Callable[[Optional[Any]], Any]
+
+
+class SharedState:
+    """Backend interface - keys with optional TTL plus capped append-only lists"""
+
+    backend = "base"
+    shared = False  # True when other processes see our writes
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        """Add to an integer counter (missing counts as 0) and return the new value"""
+        raise NotImplementedError
+
+    def update(self, key: str, updater: Updater) -> Any:
+        """Atomically replace a value with updater(current_value)"""
+        raise NotImplementedError
+
+    def push(self, key: str, values: List[Any], max_len: int):
+        """Append values to a list, keeping only the newest max_len"""
+        raise NotImplementedError
+
+    def items(self, key: str, last: Optional[int] = None) -> List[Any]:
+        """Whole list, or only its newest `last` values - oldest first"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "shared": self.shared}
+
+    def close(self):
+        pass
+
+
+class InProcessState(SharedState):
+    """Process-local backend - least recently used keys evicted past max_entries"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at or None, JSON text or deque of JSON texts)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: str, value, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            raw = self._live(key)
+        return json.loads(raw) if isinstance(raw, str) else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raw = json.dumps(value)
+        with self._lock:
+            self._store(key, raw, ttl)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(json.loads(self._live(key) or "0")) + amount
+            self._store(key, json.dumps(value))
+        return value
+
+    def update(self, key: str, updater: Updater) -> Any:
+        with self._lock:
+            raw = self._live(key)
+            value = updater(json.loads(raw) if isinstance(raw, str) else None)
+            self._store(key, json.dumps(value))
+        return value
+
+    def push(self, key: str, values: List[Any], max_len: int):
+        raws = [json.dumps(v) for v in values]
+        with self._lock:
+            log = self._live(key)
+            if not isinstance(log, deque) or log.maxlen != max_len:
+                log = deque(log if isinstance(log, deque) else (), maxlen=max_len)
+            log.extend(raws)
+            self._store(key, log)
+
+    def items(self, key: str, last: Optional[int] = None) -> List[Any]:
+        with self._lock:
+            log = self._live(key)
+            if not isinstance(log, deque):
+                return []
+            raws = list(log)
+        if last is not None:
+            raws = raws[-last:] if last > 0 else []
+        return [json.loads(raw) for raw in raws]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "keys": len(self._data), "max_entries": self.max_entries}
+
+
+class SQLiteState(SharedState):
+    """WAL-mode SQLite backend - shared by every process on the host.
+
+    Writes that read first take the write lock up front (BEGIN IMMEDIATE), so
+    counters, updates and list trims never interleave between workers.
+    Expired keys are purged every `purge_every` writes.
+    """
+
+    backend = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, purge_every: int = 500):
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []  # Every thread's connection, closed together
+        self._conns_lock = threading.Lock()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS lists (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lists_key ON lists (key, seq);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread - executor threads never share a handle"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Used only by its own thread; close() may run on another one at shutdown
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _read(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, conn: sqlite3.Connection, key: str, raw: str, ttl: Optional[float] = None):
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, raw, time.time() + ttl if ttl else None)
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._read(self._conn(), key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._write(self._conn(), key, json.dumps(value), ttl)
+
+    def delete(self, key: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.execute("DELETE FROM lists WHERE key = ?", (key,))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        def work(conn):
+            value = int(json.loads(self._read(conn, key) or "0")) + amount
+            self._write(conn, key, json.dumps(value))
+            return value
+        return self._transaction(work)
+
+    def update(self, key: str, updater: Updater) -> Any:
+        def work(conn):
+            raw = self._read(conn, key)
+            value = updater(json.loads(raw) if raw is not None else None)
+            self._write(conn, key, json.dumps(value))
+            return value
+        return self._transaction(work)
+
+    def push(self, key: str, values: List[Any], max_len: int):
+        def work(conn):
+            conn.executemany(
+                "INSERT INTO lists (key, value) VALUES (?, ?)",
+                [(key, json.dumps(v)) for v in values]
+            )
+            conn.execute(
+                """DELETE FROM lists WHERE key = ? AND seq <= (
+                       SELECT seq FROM lists WHERE key = ? ORDER BY seq DESC LIMIT 1 OFFSET ?
+                   )""",
+                (key, key, max_len)
+            )
+        if values:
+            self._transaction(work)
+
+    def items(self, key: str, last: Optional[int] = None) -> List[Any]:
+        if last is not None and last <= 0:
+            return []
+        rows = self._conn().execute(
+            "SELECT value FROM lists WHERE key = ? ORDER BY seq DESC LIMIT ?",
+            (key, -1 if last is None else last)
+        ).fetchall()
+        return [json.loads(raw) for (raw,) in reversed(rows)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "path": self.path}
+
+    def close(self):
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+
+class RedisState(SharedState):
+    """Redis-protocol backend - lists map to RPUSH/LTRIM, updates use WATCH/MULTI"""
+
+    backend = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str = ""):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SHARED_STATE_BACKEND=redis needs the redis package (pip install redis)") from e
+        self._redis = redis
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self._client.incrby(self.prefix + key, amount)
+
+    def update(self, key: str, updater: Updater) -> Any:
+        key = self.prefix + key
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    value = updater(json.loads(raw) if raw is not None else None)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(value))
+                    pipe.execute()
+                    return value
+                except self._redis.WatchError:
+                    # Another worker wrote the key first - retry on its value
+                    continue
+
+    def push(self, key: str, values: List[Any], max_len: int):
+        if not values:
+            return
+        key = self.prefix + key
+        with self._client.pipeline() as pipe:
+            pipe.rpush(key, *(json.dumps(v) for v in values))
+            pipe.ltrim(key, -max_len, -1)
+            pipe.execute()
+
+    def items(self, key: str, last: Optional[int] = None) -> List[Any]:
+        if last is not None and last <= 0:
+            return []
+        raws = self._client.lrange(self.prefix + key, 0 if last is None else -last, -1)
+        return [json.loads(raw) for raw in raws]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "host": self._client.connection_pool.connection_kwargs.get("host")}
+
+    def close(self):
+        self._client.close()
+
+
+def create_shared_state(config: Config = None) -> SharedState:
+    """Build the backend selected by Config.SHARED_STATE_BACKEND"""
+    config = config or Config()
+    if config.SHARED_STATE_BACKEND == "memory":
+        return InProcessState(config.SHARED_STATE_MAX_ENTRIES)
+    if config.SHARED_STATE_BACKEND == "sqlite":
+        return SQLiteState(config.SHARED_STATE_PATH)
+    if config.SHARED_STATE_BACKEND == "redis":
+        return RedisState(config.REDIS_URL, config.SHARED_STATE_PREFIX)
+    raise ValueError(f"Unknown shared state backend: {config.SHARED_STATE_BACKEND}")
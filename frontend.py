@@ -2,10 +2,11 @@
 import streamlit as st
 import requests
 import json
+import time
 import uuid
 from datetime import datetime
-import asyncio
-import aiohttp
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Page configuration
 st.set_page_config(
@@ -60,18 +61,84 @@ if 'user_id' not in st.session_state:
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
+# Seconds between re-renders of the streamed response
+STREAM_RENDER_INTERVAL = 0.08
+
 # Cached functions for better performance
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One pooled keep-alive session for all reruns and browser sessions"""
+    session = requests.Session()
+    # Retry only failed connects - a chat POST that reached the server is never replayed
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=20, max_retries=Retry(connect=2, read=0, status=0, backoff_factor=0.2))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_system_status():
     """Cached system status check"""
     try:
-        response = requests.get(f"{API_BASE_URL}/psychology/status", timeout=5)
+        response = get_http_session().get(f"{API_BASE_URL}/psychology/status", timeout=5)
         if response.status_code == 200:
             return response.json()
     except:
         pass
     return None
 
+def stream_chat(query: str, user_id: str):
+    """Yield (event, data) from the streaming chat endpoint as they arrive"""
+    with get_http_session().post(
+        f"{API_BASE_URL}/psychology/chat/stream",
+        json={"query": query, "user_id": user_id},
+        stream=True,
+        timeout=(5, 60)  # Connect timeout, then max seconds between streamed chunks
+    ) as response:
+        if response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After", "a few")
+            raise RuntimeError(f"The service is busy. Please try again in {retry_after} seconds.")
+        response.raise_for_status()
+
+        event, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+
+def render_model_info(container, data):
+    container.markdown(f"""
+    <div class="model-info">
+        <strong>AI Model:</strong> {data.get('model_used', 'Unknown').upper()} | 
+        <strong>Reason:</strong> {data.get('model_selection_reason', 'Auto-selected')}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_videos(videos):
+    """YouTube cards - rendered once the response text is complete"""
+    if not videos:
+        return
+    st.subheader("Recommended Videos")
+    
+    cols = st.columns(2)
+    for i, video in enumerate(videos[:4]):  # Limit to 4 videos
+        with cols[i % 2]:
+            st.markdown(f"""
+            <div class="video-card">
+                <h4 style="font-size: 0.9rem; margin-bottom: 0.3rem;">{video.get('title', 'No title')[:60]}...</h4>
+                <p style="font-size: 0.8rem; margin-bottom: 0.5rem;"><strong>By:</strong> {video.get('channel', 'Unknown')}</p>
+                <a href="{video.get('url', '#')}" target="_blank">
+                    <button style="background: #667eea; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 0.8rem;">
+                        ▶ Watch
+                    </button>
+                </a>
+            </div>
+            """, unsafe_allow_html=True)
+
 # Header
 st.markdown("""
 <div class="main-header">
@@ -101,52 +168,60 @@ with st.sidebar:
         st.session_state.chat_history = []
         st.rerun()
 
-# Main interface
-st.header("Share Your Concerns")
-
-# Optimized input
-user_input = st.text_area(
-    "Describe your psychological concern:",
-    height=120,
-    placeholder="Example: 'I've been feeling anxious about work and it's affecting my sleep...'"
-)
-
-# Submit with progress bar
-if st.button("🔍 Get Support", type="primary"):
-    if user_input.strip():
-        # Show progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        try:
-            status_text.text("Selecting optimal AI model...")
-            progress_bar.progress(20)
-            
-            status_text.text("Analyzing your concern...")
-            progress_bar.progress(40)
+# Main interface - a fragment, so submitting only reruns this part of the page
+@st.fragment
+def chat_panel():
+    st.header("Share Your Concerns")
+    
+    # Optimized input
+    user_input = st.text_area(
+        "Describe your psychological concern:",
+        height=120,
+        placeholder="Example: 'I've been feeling anxious about work and it's affecting my sleep...'"
+    )
+    
+    # Submit - progress reflects the real stream, not a timer
+    if st.button("🔍 Get Support", type="primary"):
+        if user_input.strip():
+            status_text = st.empty()
+            model_info = st.empty()
             
-            # Make API request with timeout
-            response = requests.post(
-                f"{API_BASE_URL}/psychology/chat",
-                json={
-                    "query": user_input,
-                    "user_id": st.session_state.user_id
-                },
-                timeout=30  # 30 second timeout
-            )
+            # Main response
+            st.markdown("""
+            <div class="response-container">
+                <h3>Your Psychology Support Plan</h3>
+            </div>
+            """, unsafe_allow_html=True)
+            response_placeholder = st.empty()
             
-            progress_bar.progress(80)
-            status_text.text("Preparing response...")
+            status_text.text("Selecting optimal AI model...")
+            data = {"response": "", "youtube_videos": []}
+            last_render = 0.0
             
-            if response.status_code == 200:
-                data = response.json()
+            try:
+                for event, payload in stream_chat(user_input, st.session_state.user_id):
+                    if event == "meta":
+                        data.update(payload)
+                        render_model_info(model_info, data)
+                        status_text.text("Writing your response...")
+                    elif event == "token":
+                        data["response"] += payload["text"]
+                        # Throttle re-renders; each one ships the whole markdown block
+                        if time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+                            response_placeholder.markdown(data["response"] + "▌")
+                            last_render = time.monotonic()
+                    elif event == "videos":
+                        data["youtube_videos"] = payload.get("youtube_videos", [])
+                    elif event == "done":
+                        data["response"] = payload.get("response", data["response"])
+                    elif event == "error":
+                        data.update(payload)
                 
-                progress_bar.progress(100)
-                status_text.text("Complete!")
-                
-                # Clear progress indicators
-                progress_bar.empty()
                 status_text.empty()
+                response_placeholder.markdown(data["response"])
+                
+                # YouTube videos (compact display), after the text
+                render_videos(data["youtube_videos"])
                 
                 # Add to chat history
                 st.session_state.chat_history.append({
@@ -155,69 +230,30 @@ if st.button("🔍 Get Support", type="primary"):
                     "response": data,
                 })
                 
-                # Display model info (compact)
-                st.markdown(f"""
-                <div class="model-info">
-                    <strong>AI Model:</strong> {data.get('model_used', 'Unknown').upper()} | 
-                    <strong>Reason:</strong> {data.get('model_selection_reason', 'Auto-selected')}
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Main response
-                st.markdown(f"""
-                <div class="response-container">
-                    <h3>Your Psychology Support Plan</h3>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Response content
-                st.markdown(data["response"])
-                
-                # YouTube videos (compact display)
-                if data.get("youtube_videos"):
-                    st.subheader("Recommended Videos")
-                    
-                    cols = st.columns(2)
-                    for i, video in enumerate(data["youtube_videos"][:4]):  # Limit to 4 videos
-                        with cols[i % 2]:
-                            st.markdown(f"""
-                            <div class="video-card">
-                                <h4 style="font-size: 0.9rem; margin-bottom: 0.3rem;">{video.get('title', 'No title')[:60]}...</h4>
-                                <p style="font-size: 0.8rem; margin-bottom: 0.5rem;"><strong>By:</strong> {video.get('channel', 'Unknown')}</p>
-                                <a href="{video.get('url', '#')}" target="_blank">
-                                    <button style="background: #667eea; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 0.8rem;">
-                                        ▶ Watch
-                                    </button>
-                                </a>
-                            </div>
-                            """, unsafe_allow_html=True)
-                
-            else:
-                st.error(f"Error: {response.status_code}")
-                progress_bar.empty()
+            except requests.exceptions.Timeout:
                 status_text.empty()
-                
-        except requests.exceptions.Timeout:
-            st.error("Request timed out. Please try again.")
-            progress_bar.empty()
-            status_text.empty()
-        except Exception as e:
-            st.error(f"Connection error: {str(e)}")
-            progress_bar.empty()
-            status_text.empty()
-    else:
-        st.warning("Please enter your concern to get support.")
-
-# Compact chat history
-if st.session_state.chat_history:
-    st.header("Recent History")
+                st.error("Request timed out. Please try again.")
+            except RuntimeError as e:
+                status_text.empty()
+                st.warning(str(e))
+            except Exception as e:
+                status_text.empty()
+                st.error(f"Connection error: {str(e)}")
+        else:
+            st.warning("Please enter your concern to get support.")
     
-    for i, chat in enumerate(reversed(st.session_state.chat_history[-2:]), 1):  # Show only last 2
-        with st.expander(f"Session {len(st.session_state.chat_history) - i + 1} - {chat['timestamp']}"):
-            st.write(f"**Query:** {chat['query'][:100]}...")
-            st.write(f"**Model:** {chat['response'].get('model_used', 'Unknown').upper()}")
-            response_preview = chat['response']['response'][:300]
-            st.write(f"**Response:** {response_preview}..." if len(chat['response']['response']) > 300 else response_preview)
+    # Compact chat history
+    if st.session_state.chat_history:
+        st.header("Recent History")
+        
+        for i, chat in enumerate(reversed(st.session_state.chat_history[-2:]), 1):  # Show only last 2
+            with st.expander(f"Session {len(st.session_state.chat_history) - i + 1} - {chat['timestamp']}"):
+                st.write(f"**Query:** {chat['query'][:100]}...")
+                st.write(f"**Model:** {chat['response'].get('model_used', 'Unknown').upper()}")
+                response_preview = chat['response']['response'][:300]
+                st.write(f"**Response:** {response_preview}..." if len(chat['response']['response']) > 300 else response_preview)
+
+chat_panel()
 
 # Compact crisis resources
 st.markdown("""
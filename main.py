@@ -1,12 +1,27 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from api.endpoints import psycho
+from core.metrics import metrics
+from services.container import ServiceContainer
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services live on app.state for the endpoints, not as import-time globals
+    app.state.services = ServiceContainer()
+    await app.state.services.start()
+
+    yield
+
+    await app.state.services.close()
+
 app = FastAPI(
     title="PsychoHealer API",
     description="AI-powered Psychology Assistant API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,6 +44,11 @@ async def root():
         "description": "AI-powered Psychology Assistant"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "PsychoHealer"}
@@ -1,68 +1,162 @@
 # services/chat_services.py
 import json
+import re
+import concurrent.futures
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from core.config import Config
+from .chat_store import ConversationStore
+from .query_classifier import query_classifier
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s|\n")
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    """First sentence or line, clipped to limit characters"""
+    text = text.replace("*", "").strip().lstrip("#- ")
+    sentence = _SENTENCE_END.split(text, 1)[0].strip()
+    return sentence if len(sentence) <= limit else sentence[:limit].rstrip() + "..."
+
 
 class ChatMemoryService:
-    def __init__(self):
-        self.conversations: Dict[str, List[Dict]] = {}
-        self.user_profiles: Dict[str, Dict] = {}
+    def __init__(self, store: ConversationStore):
+        self.store = store
+        # Single worker keeps each user's summary updates in message order
+        self.summary_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
     
     def add_message(self, user_id: str, message: str, response: str, session_data: Optional[Dict] = None):
         """Add a conversation message to memory"""
-        if user_id not in self.conversations:
-            self.conversations[user_id] = []
-            self.user_profiles[user_id] = {
-                "first_session": datetime.now().isoformat(),
-                "total_sessions": 0,
-                "current_issues": [],
-                "progress_notes": []
-            }
-        
-        self.conversations[user_id].append({
-            "timestamp": datetime.now().isoformat(),
-            "user_message": message,
-            "bot_response": response,
-            "session_data": session_data or {}
-        })
-        
-        self.user_profiles[user_id]["total_sessions"] += 1
+        self.add_messages([(user_id, message, response, session_data)])
+
+    def add_messages(self, exchanges: List[Tuple[str, str, str, Optional[Dict]]]):
+        """Add (user_id, message, response, session_data) exchanges in one store write"""
+        sessions: Dict[str, int] = {}
+        entries = []
+        for user_id, message, response, session_data in exchanges:
+            sessions[user_id] = sessions.get(user_id, 0) + 1
+            entries.append((user_id, {
+                "timestamp": datetime.now().isoformat(),
+                "user_message": message,
+                "bot_response": response,
+                "session_data": session_data or {}
+            }))
+        self.store.append_many(entries)
+
+        for user_id, count in sessions.items():
+            def bump_sessions(profile: Optional[Dict], count: int = count) -> Dict:
+                if profile is None:
+                    profile = {
+                        "first_session": datetime.now().isoformat(),
+                        "total_sessions": 0,
+                        "current_issues": [],
+                        "progress_notes": []
+                    }
+                profile["total_sessions"] += count
+                return profile
+
+            self.store.update_profile(user_id, bump_sessions)
+
+        # Fold the new exchanges into the rolling summaries off the request path
+        for user_id, message, response, _ in exchanges:
+            self.summary_executor.submit(self._update_summary, user_id, message, response)
+
+    def _update_summary(self, user_id: str, message: str, response: str):
+        """Incrementally merge one exchange into the user's stored summary"""
+        themes = [k for keywords in query_classifier.match(message).values() for k in keywords]
+        entry = {
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "topic": _first_sentence(message, 100),
+            "assessment": _first_sentence(response, 120)
+        }
+
+        def merge(profile: Optional[Dict]) -> Dict:
+            summary = profile.setdefault("summary", {
+                "recent": [],
+                "earlier": [],
+                "older_sessions": 0,
+                "themes": {}
+            })
+            summary["recent"].append(entry)
+
+            # Recent sessions age into one-line topics, then into a bare count
+            while len(summary["recent"]) > Config.SUMMARY_RECENT_SESSIONS:
+                aged = summary["recent"].pop(0)
+                summary["earlier"].append(f"{aged['date']}: {aged['topic'][:60]}")
+            while len(summary["earlier"]) > Config.SUMMARY_EARLIER_SESSIONS:
+                summary["earlier"].pop(0)
+                summary["older_sessions"] += 1
+
+            counts = summary["themes"]
+            for theme in themes:
+                counts[theme] = counts.get(theme, 0) + 1
+            if len(counts) > Config.SUMMARY_MAX_THEMES:
+                top = sorted(counts.items(), key=lambda kv: -kv[1])[:Config.SUMMARY_MAX_THEMES]
+                summary["themes"] = dict(top)
+            return profile
+
+        if self.store.get_profile(user_id) is not None:
+            self.store.update_profile(user_id, merge)
+
+    def flush_summaries(self):
+        """Block until queued summary updates are applied"""
+        self.summary_executor.submit(lambda: None).result()
+
+    def close(self):
+        """Apply queued summary updates, then close the store - blocking"""
+        self.summary_executor.shutdown(wait=True)
+        self.store.close()
     
     def get_conversation_history(self, user_id: str, limit: int = 10) -> List[Dict]:
         """Get recent conversation history"""
-        if user_id not in self.conversations:
-            return []
-        return self.conversations[user_id][-limit:]
+        return self.store.tail(user_id, limit)
+
+    def get_history_page(self, user_id: str, limit: int = 10, before: Optional[int] = None,
+                         since: Optional[float] = None, until: Optional[float] = None,
+                         fields: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        """One page of history walking back from `before`, optionally time-bounded and projected"""
+        return self.store.page(user_id, limit, before, since, until, fields)
+
+    def history_version(self, user_id: str) -> Tuple[Optional[int], Optional[int]]:
+        """Cheap marker that changes whenever the user's stored history does"""
+        return self.store.version(user_id)
     
     def get_context_summary(self, user_id: str) -> str:
-        """Generate context summary for the AI"""
-        if user_id not in self.conversations:
+        """Render the stored rolling summary - one profile read, no history scan"""
+        profile = self.store.get_profile(user_id)
+        if profile is None:
             return "New user - no previous history."
         
-        history = self.conversations[user_id]
-        profile = self.user_profiles[user_id]
-        
         context = f"""
         PATIENT CONTEXT:
         - Total sessions: {profile['total_sessions']}
         - First session: {profile['first_session']}
-        - Current issues: {', '.join(profile.get('current_issues', ['None documented']))}
+        - Current issues: {', '.join(profile.get('current_issues') or ['None documented'])}
 
         RECENT CONVERSATION SUMMARY:
         """
-                
-        # Add last 3 conversations
-        recent = history[-3:] if len(history) >= 3 else history
-        for i, conv in enumerate(recent, 1):
-            context += f"\nSession {i}: User discussed - {conv['user_message'][:100]}..."
+
+        summary = profile.get("summary")
+        if not summary:
+            return context
+
+        if summary["themes"]:
+            themes = sorted(summary["themes"].items(), key=lambda kv: -kv[1])
+            context += "\nRecurring themes: " + ", ".join(f"{t} (x{n})" for t, n in themes)
+        if summary["older_sessions"]:
+            context += f"\n{summary['older_sessions']} older sessions not detailed."
+        for line in summary["earlier"]:
+            context += f"\nEarlier - {line}"
+        for i, conv in enumerate(summary["recent"], 1):
+            context += f"\nSession {i}: User discussed - {conv['topic']} | Guidance given - {conv['assessment']}"
         
         return context
     
     def update_user_profile(self, user_id: str, issues: List[str], notes: List[str]):
         """Update user profile with current issues and progress notes"""
-        if user_id in self.user_profiles:
-            self.user_profiles[user_id]["current_issues"] = issues
-            self.user_profiles[user_id]["progress_notes"].extend(notes)
+        def apply(profile: Optional[Dict]) -> Optional[Dict]:
+            profile["current_issues"] = issues
+            profile["progress_notes"].extend(notes)
+            return profile
 
-# Initialize global memory service
-memory_service = ChatMemoryService()
\ No newline at end of file
+        if self.store.get_profile(user_id) is not None:
+            self.store.update_profile(user_id, apply)
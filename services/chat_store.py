@@ -0,0 +1,428 @@
+# services/chat_store.py
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+from core.config import Config
+from core.shared_state import SharedState
+
+ProfileUpdater = Callable[[Optional[Dict]], Dict]
+
+PREVIEW_CHARS = 160
+# Fields a history page can be projected to - "preview" is the start of bot_response
+HISTORY_FIELDS = ("timestamp", "user_message", "bot_response", "session_data", "preview")
+
+
+def message_time(message: Dict) -> float:
+    """Epoch seconds of a message's timestamp, for the per-user time index"""
+    try:
+        return datetime.fromisoformat(message["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def project(message: Dict, fields: Optional[List[str]]) -> Dict:
+    """Message reduced to the requested fields (None keeps everything)"""
+    if fields is None:
+        return message
+    projected = {}
+    for field in fields:
+        if field == "preview":
+            projected["preview"] = (message.get("bot_response") or "")[:PREVIEW_CHARS]
+        else:
+            projected[field] = message.get(field)
+    return projected
+
+
+def page_newest_first(rows, limit: int, before: Optional[int], since: Optional[float],
+                      until: Optional[float], fields: Optional[List[str]]) -> Tuple[List[Dict], bool]:
+    """Page over (id, time, message) rows given newest first - shared by the list-backed stores"""
+    matches = []
+    for message_id, ts, message in rows:
+        if before is not None and message_id >= before:
+            continue
+        if until is not None and ts >= until:
+            continue
+        if since is not None and ts < since:
+            # Newest first, so everything further back is older still
+            break
+        matches.append({"id": message_id, **project(message, fields)})
+        if len(matches) > limit:
+            break
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    matches.reverse()
+    return matches, has_more
+
+
+class ConversationStore:
+    """Storage backend for ChatMemoryService - messages and user profiles"""
+
+    def append(self, user_id: str, message: Dict):
+        raise NotImplementedError
+
+    def append_many(self, entries: List[Tuple[str, Dict]]):
+        """Append (user_id, message) pairs in order - backends may batch the write"""
+        for user_id, message in entries:
+            self.append(user_id, message)
+
+    def tail(self, user_id: str, limit: int) -> List[Dict]:
+        """Most recent `limit` messages, oldest first"""
+        raise NotImplementedError
+
+    def page(self, user_id: str, limit: int, before: Optional[int] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        """Up to `limit` newest messages with id < before and since <= time < until.
+
+        Returns (messages oldest first, each with its "id"; whether older matches exist).
+        """
+        raise NotImplementedError
+
+    def version(self, user_id: str) -> Tuple[Optional[int], Optional[int]]:
+        """(oldest id, newest id) still stored for the user - changes on append and compaction"""
+        raise NotImplementedError
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def update_profile(self, user_id: str, updater: ProfileUpdater) -> Dict:
+        """Atomically replace a profile with updater(current_profile)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store - per-user ring buffers, least recently active users evicted"""
+
+    def __init__(self, max_messages_per_user: int, max_users: int):
+        self.max_messages_per_user = max_messages_per_user
+        self.max_users = max_users
+        # Per user: ring buffer of (id, time, message), already in id and time order
+        self._messages: "OrderedDict[str, deque]" = OrderedDict()
+        # One store-wide sequence, like SQLite AUTOINCREMENT - ids are never reused after an
+        # eviction, so old cursors and ETags can't match a returning user's new messages
+        self._last_id = 0
+        self._profiles: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def append(self, user_id: str, message: Dict):
+        with self._lock:
+            history = self._messages.get(user_id)
+            if history is None:
+                history = self._messages[user_id] = deque(maxlen=self.max_messages_per_user)
+            self._messages.move_to_end(user_id)
+            self._last_id += 1
+            history.append((self._last_id, message_time(message), message))
+
+            while len(self._messages) > self.max_users:
+                evicted, _ = self._messages.popitem(last=False)
+                self._profiles.pop(evicted, None)
+
+    def tail(self, user_id: str, limit: int) -> List[Dict]:
+        with self._lock:
+            history = self._messages.get(user_id)
+            if not history or limit <= 0:
+                return []
+            recent = [message for _, _, message in islice(reversed(history), limit)]
+        recent.reverse()
+        return recent
+
+    def page(self, user_id: str, limit: int, before: Optional[int] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        with self._lock:
+            return page_newest_first(reversed(self._messages.get(user_id) or ()), limit, before, since, until, fields)
+
+    def version(self, user_id: str) -> Tuple[Optional[int], Optional[int]]:
+        with self._lock:
+            history = self._messages.get(user_id)
+            if not history:
+                return None, None
+            return history[0][0], history[-1][0]
+
+    # Deep copies in and out - summaries hold nested lists that updaters mutate in place
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            return copy.deepcopy(profile) if profile else None
+
+    def update_profile(self, user_id: str, updater: ProfileUpdater) -> Dict:
+        with self._lock:
+            current = self._profiles.get(user_id)
+            profile = updater(copy.deepcopy(current) if current else None)
+            self._profiles[user_id] = copy.deepcopy(profile)
+            return profile
+
+
+class SQLiteConversationStore(ConversationStore):
+    """On-disk store in WAL mode - safe to share between uvicorn workers.
+
+    Messages are indexed on (user_id, id) so tail reads are a bounded index
+    scan. Each user is compacted back to `max_messages_per_user` rows every
+    `compact_every` appends.
+    """
+
+    def __init__(self, path: str, max_messages_per_user: int, compact_every: int = 10):
+        self.path = path
+        self.max_messages_per_user = max_messages_per_user
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []  # Every thread's connection, closed together
+        self._conns_lock = threading.Lock()
+        self._appends: Dict[str, int] = {}
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                ts REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_user ON messages (user_id, id);
+            CREATE TABLE IF NOT EXISTS profiles (
+                user_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL
+            );
+        """)
+        self._migrate(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_user_ts ON messages (user_id, ts)")
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add and backfill the ts column on databases created before the time index"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+        if "ts" not in columns:
+            conn.execute("ALTER TABLE messages ADD COLUMN ts REAL")
+        rows = conn.execute("SELECT id, payload FROM messages WHERE ts IS NULL").fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE messages SET ts = ? WHERE id = ?",
+                [(message_time(json.loads(payload)), message_id) for message_id, payload in rows]
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread - executor threads never share a handle"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Used only by its own thread; close() may run on another one at shutdown
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def append(self, user_id: str, message: Dict):
+        self.append_many([(user_id, message)])
+
+    def append_many(self, entries: List[Tuple[str, Dict]]):
+        """One transaction for the whole batch instead of a commit per message"""
+        if not entries:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO messages (user_id, payload, ts) VALUES (?, ?, ?)",
+                [(user_id, json.dumps(message), message_time(message)) for user_id, message in entries]
+            )
+            counts: Dict[str, int] = {}
+            for user_id, _ in entries:
+                counts[user_id] = counts.get(user_id, 0) + 1
+            for user_id, count in counts.items():
+                appends = self._appends.get(user_id, 0) + count
+                if appends >= self.compact_every:
+                    self._compact(conn, user_id)
+                    appends = 0
+                if len(self._appends) > 10000:
+                    # Counters are only a compaction hint - cap their memory
+                    self._appends.clear()
+                self._appends[user_id] = appends
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _compact(self, conn: sqlite3.Connection, user_id: str):
+        """Drop everything older than the newest max_messages_per_user rows"""
+        conn.execute(
+            """DELETE FROM messages WHERE user_id = ? AND id <= (
+                   SELECT id FROM messages WHERE user_id = ?
+                   ORDER BY id DESC LIMIT 1 OFFSET ?
+               )""",
+            (user_id, user_id, self.max_messages_per_user)
+        )
+
+    def tail(self, user_id: str, limit: int) -> List[Dict]:
+        limit = min(limit, self.max_messages_per_user)
+        if limit <= 0:
+            return []
+        rows = self._conn().execute(
+            "SELECT payload FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in reversed(rows)]
+
+    # Oldest id within the newest max_messages_per_user rows (0 while the user has fewer)
+    _OLDEST_KEPT_SQL = "COALESCE((SELECT id FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?), 0)"
+
+    # Projection happens in SQL, so preview pages never load full responses
+    _FIELD_SQL = {
+        "timestamp": "json_extract(payload, '$.timestamp')",
+        "user_message": "json_extract(payload, '$.user_message')",
+        "bot_response": "json_extract(payload, '$.bot_response')",
+        "session_data": "json_extract(payload, '$.session_data')",
+        "preview": f"substr(json_extract(payload, '$.bot_response'), 1, {PREVIEW_CHARS})",
+    }
+
+    def page(self, user_id: str, limit: int, before: Optional[int] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        # Same cap as tail() - rows past it may linger until the next compaction
+        conditions = ["user_id = ?", f"id >= {self._OLDEST_KEPT_SQL}"]
+        params = [user_id, user_id, self.max_messages_per_user - 1]
+        if before is not None:
+            conditions.append("id < ?")
+            params.append(before)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts < ?")
+            params.append(until)
+        columns = ", ".join(self._FIELD_SQL[f] for f in fields) if fields is not None else "payload"
+        rows = self._conn().execute(
+            f"SELECT id, {columns} FROM messages WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        messages = []
+        for row in reversed(rows[:limit]):
+            if fields is None:
+                messages.append({"id": row[0], **json.loads(row[1])})
+                continue
+            message = {"id": row[0]}
+            for field, value in zip(fields, row[1:]):
+                message[field] = json.loads(value) if field == "session_data" and value else value
+            messages.append(message)
+        return messages, has_more
+
+    def version(self, user_id: str) -> Tuple[Optional[int], Optional[int]]:
+        return self._conn().execute(
+            f"""SELECT (SELECT id FROM messages WHERE user_id = ? AND id >= {self._OLDEST_KEPT_SQL}
+                        ORDER BY id ASC LIMIT 1),
+                       (SELECT id FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT 1)""",
+            (user_id, user_id, self.max_messages_per_user - 1, user_id)
+        ).fetchone()
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT payload FROM profiles WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_profile(self, user_id: str, updater: ProfileUpdater) -> Dict:
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front so other workers can't interleave
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT payload FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            profile = updater(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, payload) VALUES (?, ?)",
+                (user_id, json.dumps(profile))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return profile
+
+    def close(self):
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+
+class SharedStateConversationStore(ConversationStore):
+    """Store on the SharedState backend - every worker sees the same history and profiles.
+
+    Each user has a capped list of {"id", "ts", "message"} records, an id
+    counter and a profile key. Ids come from the counter, so records pushed
+    by two workers at once can land out of order; reads sort by id.
+    """
+
+    def __init__(self, state: SharedState, max_messages_per_user: int):
+        self.state = state
+        self.max_messages_per_user = max_messages_per_user
+
+    def append(self, user_id: str, message: Dict):
+        self.append_many([(user_id, message)])
+
+    def append_many(self, entries: List[Tuple[str, Dict]]):
+        """One counter bump and one list push per user in the batch"""
+        grouped: Dict[str, List[Dict]] = {}
+        for user_id, message in entries:
+            grouped.setdefault(user_id, []).append(message)
+        for user_id, messages in grouped.items():
+            last_id = self.state.incr(f"chat:seq:{user_id}", len(messages))
+            first_id = last_id - len(messages) + 1
+            records = [
+                {"id": first_id + i, "ts": message_time(message), "message": message}
+                for i, message in enumerate(messages)
+            ]
+            self.state.push(f"chat:log:{user_id}", records, self.max_messages_per_user)
+
+    def _records(self, user_id: str, last: Optional[int] = None) -> List[Dict]:
+        records = self.state.items(f"chat:log:{user_id}", last)
+        records.sort(key=lambda record: record["id"])
+        return records
+
+    def tail(self, user_id: str, limit: int) -> List[Dict]:
+        if limit <= 0:
+            return []
+        return [record["message"] for record in self._records(user_id, limit)]
+
+    def page(self, user_id: str, limit: int, before: Optional[int] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        rows = ((r["id"], r["ts"], r["message"]) for r in reversed(self._records(user_id)))
+        return page_newest_first(rows, limit, before, since, until, fields)
+
+    def version(self, user_id: str) -> Tuple[Optional[int], Optional[int]]:
+        records = self._records(user_id)
+        if not records:
+            return None, None
+        return records[0]["id"], records[-1]["id"]
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        return self.state.get(f"chat:profile:{user_id}")
+
+    def update_profile(self, user_id: str, updater: ProfileUpdater) -> Dict:
+        return self.state.update(f"chat:profile:{user_id}", updater)
+
+
+def create_conversation_store(state: SharedState, config: Config = None) -> ConversationStore:
+    """Build the backend selected by Config.CHAT_STORE_BACKEND - "shared" keeps history in `state`"""
+    config = config or Config()
+    if config.CHAT_STORE_BACKEND == "shared":
+        return SharedStateConversationStore(state, config.MAX_HISTORY_PER_USER)
+    if config.CHAT_STORE_BACKEND == "sqlite":
+        return SQLiteConversationStore(config.CHAT_STORE_PATH, config.MAX_HISTORY_PER_USER)
+    if config.CHAT_STORE_BACKEND == "memory":
+        return InMemoryConversationStore(config.MAX_HISTORY_PER_USER, config.MAX_USERS_IN_MEMORY)
+    raise ValueError(f"Unknown chat store backend: {config.CHAT_STORE_BACKEND}")
@@ -0,0 +1,78 @@
+# services/container.py
+import asyncio
+from typing import Optional
+from core.admission import AdmissionController, create_admission_controller
+from core.config import Config
+from core.shared_state import SharedState, create_shared_state
+from .chat_services import ChatMemoryService
+from .chat_store import create_conversation_store
+from .psycho_services import PsychologyService
+from . import youtube_services
+from .video_index import TherapeuticVideoIndex
+
+
+class ServiceContainer:
+    """Long-lived services - built when the app starts, drained and closed when it stops.
+
+    Nothing touches disk or the network at import: shared state, the
+    conversation store, admission control and the video index are built
+    here, and the provider SDKs are imported by a background warm-up so the
+    server starts accepting requests straight away.
+    """
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config()
+        self.shared_state: Optional[SharedState] = None
+        self.memory: Optional[ChatMemoryService] = None
+        self.admission: Optional[AdmissionController] = None
+        self.video_index: Optional[TherapeuticVideoIndex] = None
+        self.psychology: Optional[PsychologyService] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.psychology is not None:
+            return
+        # SQLite backends create their schema on open - off the event loop
+        self.shared_state = await asyncio.to_thread(create_shared_state, self.config)
+        store = await asyncio.to_thread(create_conversation_store, self.shared_state, self.config)
+        self.memory = ChatMemoryService(store)
+        self.admission = create_admission_controller(self.config)
+        self.video_index = TherapeuticVideoIndex(
+            self.config.VIDEO_INDEX_PATH, self.config.VIDEO_INDEX_TOPICS, self.shared_state
+        )
+        await asyncio.to_thread(self.video_index.load)
+        self.psychology = PsychologyService(self.memory, self.video_index, self.shared_state, self.config)
+
+        if self.config.PROVIDER_WARM_UP:
+            self._warm_up_task = asyncio.create_task(asyncio.to_thread(self._warm_up))
+        # Keep the offline video index fresh in the background
+        if self.config.YOUTUBE_API_KEY and self.config.VIDEO_INDEX_REFRESH_INTERVAL > 0:
+            self._refresh_task = asyncio.create_task(
+                self.video_index.run_refresh_loop(self.config.VIDEO_INDEX_REFRESH_INTERVAL)
+            )
+
+    def _warm_up(self):
+        """Import the provider SDKs and the YouTube client library - runs in a thread"""
+        self.psychology.providers.warm_up()
+        youtube_services.warm_up()
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            # Let the loop give up its refresher lease before shared state closes
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+        if self._warm_up_task:
+            # The import thread can't be interrupted - let it finish before closing clients
+            await asyncio.gather(self._warm_up_task, return_exceptions=True)
+        if self.psychology is not None:
+            # Flush queued conversation writes before the process exits
+            await asyncio.to_thread(self.psychology.persistence.drain, self.config.PERSIST_DRAIN_TIMEOUT)
+            # Release pooled provider connections
+            await self.psychology.providers.close()
+            self.psychology.executor.shutdown(wait=False)
+        # Only what this container built - the store before the shared state it may live in
+        if self.memory is not None:
+            await asyncio.to_thread(self.memory.close)
+        if self.shared_state is not None:
+            self.shared_state.close()
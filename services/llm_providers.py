@@ -0,0 +1,156 @@
+# services/llm_providers.py
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from core.config import Config
+
+
+class LLMProvider:
+    """Async chat-completion provider with its own concurrency limit"""
+
+    def __init__(self, name: str, client_factory: Callable[[], Any], models: Dict[str, str],
+                 max_concurrency: int, global_limit: asyncio.Semaphore):
+        self.name = name
+        self._client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.models = models
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.global_limit = global_limit
+        self.in_flight = 0
+
+    @property
+    def client(self):
+        """SDK client - its package is imported and the client built on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def supports(self, model: str) -> bool:
+        return model in self.models
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold a per-provider and a process-wide concurrency slot"""
+        async with self.global_limit, self.semaphore:
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def stream(self, messages: List[Dict[str, str]], model: str) -> AsyncIterator[str]:
+        """Streaming completion - yields content deltas"""
+        async with self._slot():
+            stream = await self.client.chat.completions.create(
+                model=self.models[model],
+                messages=messages,
+                max_tokens=Config.MAX_TOKENS,
+                temperature=Config.TEMPERATURE,
+                stream=True
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # groq's AsyncStream keeps the response open on cancel - release the pooled connection
+                await stream.close()
+
+    def stats(self) -> Dict:
+        return {
+            "models": list(self.models),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency
+        }
+
+
+class LLMProviderPool:
+    """All configured providers, sharing one pooled httpx.AsyncClient.
+
+    The groq/openai SDKs and httpx are only imported when a client is first
+    needed (or by warm_up), so importing the app stays cheap.
+    """
+
+    def __init__(self, config: Config = None):
+        self.config = config or Config()
+        self._http_client = None
+        self._http_lock = threading.Lock()
+        self.global_limit = asyncio.Semaphore(self.config.LLM_MAX_CONCURRENCY)
+        self.providers: Dict[str, LLMProvider] = {}
+
+        if self.config.GROQ_API_KEY:
+            self.providers["groq"] = LLMProvider(
+                "groq",
+                self._groq_client,
+                {m: self.config.MODELS[m] for m in ("llama", "deepseek")},
+                self.config.GROQ_MAX_CONCURRENCY,
+                self.global_limit
+            )
+
+        if self.config.OPENAI_API_KEY:
+            self.providers["openai"] = LLMProvider(
+                "openai",
+                self._openai_client,
+                {"openai": self.config.MODELS["openai"]},
+                self.config.OPENAI_MAX_CONCURRENCY,
+                self.global_limit
+            )
+
+    @property
+    def http_client(self):
+        """Shared connection pool, created with the first client"""
+        if self._http_client is None:
+            with self._http_lock:
+                if self._http_client is None:
+                    import httpx
+                    self._http_client = httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=self.config.HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=self.config.HTTP_MAX_KEEPALIVE
+                        ),
+                        timeout=httpx.Timeout(self.config.LLM_TIMEOUT, connect=10.0)
+                    )
+        return self._http_client
+
+    def _groq_client(self):
+        from groq import AsyncGroq
+        return AsyncGroq(
+            api_key=self.config.GROQ_API_KEY,
+            base_url=self.config.GROQ_BASE_URL,
+            http_client=self.http_client
+        )
+
+    def _openai_client(self):
+        import openai
+        return openai.AsyncOpenAI(
+            api_key=self.config.OPENAI_API_KEY,
+            base_url=self.config.OPENAI_BASE_URL,
+            http_client=self.http_client
+        )
+
+    def warm_up(self):
+        """Import the SDKs and build every client now - blocking, run it off the event loop"""
+        for provider in self.providers.values():
+            provider.client
+
+    def get(self, model: str) -> Optional[LLMProvider]:
+        """Provider serving the given model key, if configured"""
+        for provider in self.providers.values():
+            if provider.supports(model):
+                return provider
+        return None
+
+    def available_models(self) -> List[str]:
+        return [m for provider in self.providers.values() for m in provider.models]
+
+    def stats(self) -> Dict:
+        return {name: provider.stats() for name, provider in self.providers.items()}
+
+    async def close(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
@@ -0,0 +1,355 @@
+# services/model_router.py
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from core.config import Config
+from core.metrics import TTFT_SECONDS, MODEL_TOKENS, MODEL_GENERATION_SECONDS
+from .llm_providers import LLMProvider, LLMProviderPool
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRoutingError(Exception):
+    """Every candidate model failed or timed out"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors) or "No model available")
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one probe through after a cooldown"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Attempt abandoned without a verdict (e.g. lost a hedge race)"""
+        self._probe_in_flight = False
+
+
+class ModelStats:
+    """Exponentially weighted latency, throughput and error rate for one model"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.ttft: Optional[float] = None
+        self.tokens_per_sec: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else (1 - self.alpha) * current + self.alpha * sample
+
+    def record_first_token(self, seconds: float):
+        self.ttft = self._ewma(self.ttft, seconds)
+
+    def record_success(self, tokens: int, seconds: float):
+        self.requests += 1
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        if tokens > 1 and seconds > 0:
+            self.tokens_per_sec = self._ewma(self.tokens_per_sec, tokens / seconds)
+
+    def record_error(self):
+        self.requests += 1
+        self.errors += 1
+        self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+
+    def expected_latency(self, tokens: int) -> Optional[float]:
+        """Estimated seconds for a response of `tokens` tokens"""
+        if self.ttft is None or not self.tokens_per_sec:
+            return None
+        return self.ttft + tokens / self.tokens_per_sec
+
+    def as_dict(self) -> Dict:
+        return {
+            "ttft_ewma": round(self.ttft, 3) if self.ttft is not None else None,
+            "tokens_per_sec_ewma": round(self.tokens_per_sec, 1) if self.tokens_per_sec else None,
+            "error_rate_ewma": round(self.error_rate, 3),
+            "requests": self.requests,
+            "errors": self.errors
+        }
+
+
+class _Attempt:
+    """One provider stream pumped into a queue so attempts can race"""
+
+    def __init__(self, provider: LLMProvider, model: str, messages: List[Dict[str, str]]):
+        self.provider = provider
+        self.model = model
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.chunks = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pump = asyncio.create_task(self._pump(messages))
+        self.next_item = asyncio.create_task(self.queue.get())
+
+    async def _pump(self, messages: List[Dict[str, str]]):
+        try:
+            async for text in self.provider.stream(messages, self.model):
+                # Timed here rather than at the consumer so slow readers don't skew throughput
+                if self.first_token_at is None:
+                    self.first_token_at = time.monotonic()
+                self.chunks += 1
+                self.queue.put_nowait(("token", text))
+            self.finished_at = time.monotonic()
+            self.queue.put_nowait(("done", None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.queue.put_nowait(("error", e))
+
+    def cancel(self):
+        self.pump.cancel()
+        self.next_item.cancel()
+
+
+class ModelRouter:
+    """Routes a model choice across providers with failover and hedging.
+
+    Candidates are the requested model followed by Config.MODEL_FALLBACKS,
+    skipping providers whose circuit breaker is open. If the first token
+    doesn't arrive within the model's observed p95 time-to-first-token, the
+    next candidate is started in parallel and whichever answers first wins.
+    """
+
+    def __init__(self, providers: LLMProviderPool, config: Config = None):
+        self.providers = providers
+        self.config = config or Config()
+        self.breakers = {
+            name: CircuitBreaker(self.config.BREAKER_FAILURE_THRESHOLD, self.config.BREAKER_RESET_TIMEOUT)
+            for name in providers.providers
+        }
+        self.ttft_samples: Dict[str, deque] = {}
+        self.model_stats: Dict[str, ModelStats] = {}
+        self.decisions: deque = deque(maxlen=20)
+        self.active_streams = 0
+        self.hedges_fired = 0
+        self.failovers = 0
+
+    def stats_for(self, model: str) -> ModelStats:
+        if model not in self.model_stats:
+            self.model_stats[model] = ModelStats(self.config.MODEL_STATS_ALPHA)
+        return self.model_stats[model]
+
+    def is_healthy(self, model: str) -> bool:
+        provider = self.providers.get(model)
+        if not provider or self.breakers[provider.name].state != "closed":
+            return False
+        return self.stats_for(model).error_rate < self.config.MODEL_UNHEALTHY_ERROR_RATE
+
+    def choose_model(self, models: List[str], category: str) -> Tuple[str, str]:
+        """Pick among interchangeable models - fastest healthy one under load, else rotate"""
+        healthy = [m for m in models if self.is_healthy(m)] or list(models)
+        under_load = self.active_streams >= self.config.ADAPTIVE_LOAD_THRESHOLD
+        estimates = {m: self.stats_for(m).expected_latency(self.config.ADAPTIVE_EXPECTED_TOKENS) for m in healthy}
+
+        if under_load and all(e is not None for e in estimates.values()):
+            model = min(healthy, key=estimates.get)
+            reason = "fastest healthy model under load"
+        else:
+            model = random.choice(healthy)
+            reason = "rotation"
+
+        self.decisions.append({
+            "at": time.time(),
+            "category": category,
+            "model": model,
+            "reason": reason,
+            "active_streams": self.active_streams,
+            "estimates": {m: round(e, 3) if e is not None else None for m, e in estimates.items()}
+        })
+        return model, reason
+
+    def candidates(self, model: str) -> List[str]:
+        """Requested model first, then configured fallbacks"""
+        ordered = [model] + [m for m in self.config.MODEL_FALLBACKS.get(model, []) if m != model]
+        return [m for m in ordered if self.providers.get(m)]
+
+    def hedge_delay(self, model: str) -> float:
+        """p95 time-to-first-token once enough samples exist, else the default"""
+        samples = self.ttft_samples.get(model)
+        if not samples or len(samples) < self.config.HEDGE_MIN_SAMPLES:
+            return self.config.HEDGE_DEFAULT_DELAY
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _record_ttft(self, model: str, seconds: float):
+        self.ttft_samples.setdefault(model, deque(maxlen=200)).append(seconds)
+
+    def _hedge_index(self, pending: List[str], primary: _Attempt) -> int:
+        """Prefer hedging onto a different provider - a slow provider is usually slow for all its models"""
+        for i, model in enumerate(pending):
+            if self.providers.get(model) is not primary.provider:
+                return i
+        return 0
+
+    def _start(self, model: str, messages: List[Dict[str, str]]) -> Optional[_Attempt]:
+        provider = self.providers.get(model)
+        if not self.breakers[provider.name].allow():
+            return None
+        return _Attempt(provider, model, messages)
+
+    async def stream(self, messages: List[Dict[str, str]], model: str) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (model_used, text) chunks from the first candidate to respond"""
+        pending = self.candidates(model)
+        racing: List[_Attempt] = []
+        errors: List[str] = []
+        winner: Optional[_Attempt] = None
+        first_text = ""
+        settled = False
+        self.active_streams += 1
+
+        try:
+            while winner is None:
+                # Keep at least one attempt running
+                while not racing and pending:
+                    attempt = self._start(pending.pop(0), messages)
+                    if attempt:
+                        if errors:
+                            self.failovers += 1
+                        racing.append(attempt)
+                    else:
+                        errors.append("circuit open")
+                if not racing:
+                    raise ModelRoutingError(errors)
+
+                now = time.monotonic()
+                timeout = min(a.started + self.config.MODEL_FIRST_TOKEN_TIMEOUT for a in racing) - now
+                can_hedge = self.config.HEDGE_ENABLED and pending and len(racing) == 1
+                if can_hedge:
+                    timeout = min(timeout, racing[0].started + self.hedge_delay(racing[0].model) - now)
+
+                done, _ = await asyncio.wait(
+                    [a.next_item for a in racing], timeout=max(timeout, 0),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    now = time.monotonic()
+                    expired = [a for a in racing if now - a.started >= self.config.MODEL_FIRST_TOKEN_TIMEOUT]
+                    for attempt in expired:
+                        attempt.cancel()
+                        racing.remove(attempt)
+                        self.breakers[attempt.provider.name].record_failure()
+                        self.stats_for(attempt.model).record_error()
+                        errors.append(f"{attempt.model}: no first token within deadline")
+                    if not expired and can_hedge:
+                        hedge = self._start(pending.pop(self._hedge_index(pending, racing[0])), messages)
+                        if hedge:
+                            self.hedges_fired += 1
+                            racing.append(hedge)
+                    continue
+
+                for attempt in list(racing):
+                    if attempt.next_item not in done:
+                        continue
+                    kind, value = attempt.next_item.result()
+                    if kind == "token" and winner is None:
+                        winner, first_text = attempt, value
+                        racing.remove(attempt)
+                    elif kind != "token":
+                        racing.remove(attempt)
+                        self.breakers[attempt.provider.name].record_failure()
+                        self.stats_for(attempt.model).record_error()
+                        errors.append(f"{attempt.model}: {value or 'empty response'}")
+                        logger.warning(f"Model {attempt.model} failed: {value}")
+
+            # Hedge losers are abandoned, not failed
+            for attempt in racing:
+                attempt.cancel()
+                self.breakers[attempt.provider.name].release()
+            racing = []
+
+            ttft = (winner.first_token_at or time.monotonic()) - winner.started
+            self._record_ttft(winner.model, ttft)
+            self.stats_for(winner.model).record_first_token(ttft)
+            TTFT_SECONDS.observe(ttft, model=winner.model)
+            yield winner.model, first_text
+
+            while True:
+                kind, value = await asyncio.wait_for(winner.queue.get(), self.config.MODEL_STREAM_IDLE_TIMEOUT)
+                if kind == "token":
+                    yield winner.model, value
+                elif kind == "done":
+                    break
+                else:
+                    raise value
+            self.breakers[winner.provider.name].record_success()
+            generation_seconds = (winner.finished_at or time.monotonic()) - winner.first_token_at
+            self.stats_for(winner.model).record_success(winner.chunks, generation_seconds)
+            MODEL_TOKENS.inc(winner.chunks, model=winner.model)
+            MODEL_GENERATION_SECONDS.inc(generation_seconds, model=winner.model)
+            settled = True
+
+        except Exception:
+            if winner is not None:
+                self.breakers[winner.provider.name].record_failure()
+                self.stats_for(winner.model).record_error()
+                settled = True
+            raise
+        finally:
+            self.active_streams -= 1
+            for attempt in racing:
+                attempt.cancel()
+                self.breakers[attempt.provider.name].release()
+            if winner is not None:
+                winner.cancel()
+                if not settled:
+                    # Consumer went away mid-stream - no verdict on the provider
+                    self.breakers[winner.provider.name].release()
+
+    async def complete(self, messages: List[Dict[str, str]], model: str) -> Tuple[str, str]:
+        """Full completion as (model_used, text)"""
+        model_used, parts = model, []
+        async for model_used, text in self.stream(messages, model):
+            parts.append(text)
+        return model_used, "".join(parts).strip()
+
+    def stats(self) -> Dict:
+        return {
+            "breakers": {name: breaker.state for name, breaker in self.breakers.items()},
+            "hedge_delay": {model: round(self.hedge_delay(model), 3) for model in self.ttft_samples},
+            "hedges_fired": self.hedges_fired,
+            "failovers": self.failovers,
+            "active_streams": self.active_streams,
+            "models": {model: stats.as_dict() for model, stats in self.model_stats.items()},
+            "recent_decisions": list(self.decisions)
+        }
@@ -0,0 +1,151 @@
+# services/persistence_queue.py
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Batching write-behind queue drained by one dedicated writer thread.
+
+    submit() never blocks the caller. The writer collects items until it has
+    batch_size of them or flush_interval has passed since the first one, then
+    hands the whole batch to writer(). A thread rather than an asyncio task
+    keeps it independent of any one event loop, and keeps store writes off
+    the executor used for request-path work.
+    """
+
+    def __init__(self, name: str, writer: Callable[[List[Any]], None],
+                 batch_size: int = 50, flush_interval: float = 0.5):
+        self.name = name
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._in_batch = 0
+        self.written = 0
+        self.failed = 0
+        self.last_flush_seconds = 0.0
+
+        self.flush_seconds = metrics.histogram(
+            "psychohealer_persist_flush_seconds", "Time to write one batch from the write-behind queue"
+        )
+        self.batch_items = metrics.histogram(
+            "psychohealer_persist_batch_size", "Items per write-behind batch",
+            buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+        )
+        self.items_total = metrics.counter(
+            "psychohealer_persist_items_total", "Items leaving the write-behind queue"
+        )
+        metrics.gauge(
+            "psychohealer_persist_backlog", "Items queued for write-behind persistence",
+            lambda: self.backlog
+        )
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize() + self._in_batch
+
+    def start(self):
+        """Start the writer thread if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, item: Any):
+        """Queue an item for the next batch"""
+        self._queue.put(item)
+        if self._thread is None:
+            self.start()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Flush everything queued so far and stop the writer - True if it finished in time"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            # Nothing was ever started, but items may still be waiting
+            if self._queue.empty():
+                return True
+            self._flush(self._take_all())
+            return True
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _take_all(self) -> List[Any]:
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            self._in_batch = 1
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+
+            # Keep collecting until the batch is full or the flush deadline passes
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                self._in_batch = len(batch)
+
+            self._flush(batch)
+            if stop:
+                self._flush(self._take_all())
+                return
+
+    def _flush(self, batch: List[Any]):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            self.writer(batch)
+            self.written += len(batch)
+            self.items_total.inc(len(batch), queue=self.name, outcome="written")
+        except Exception:
+            logger.exception("Write-behind flush of %d items failed for %s", len(batch), self.name)
+            self.failed += len(batch)
+            self.items_total.inc(len(batch), queue=self.name, outcome="failed")
+        finally:
+            self._in_batch = 0
+            self.last_flush_seconds = time.perf_counter() - started
+            self.flush_seconds.observe(self.last_flush_seconds, queue=self.name)
+            self.batch_items.observe(len(batch), queue=self.name)
+
+    def stats(self) -> Dict:
+        return {
+            "backlog": self.backlog,
+            "written": self.written,
+            "failed": self.failed,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 2)
+        }
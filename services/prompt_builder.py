@@ -0,0 +1,84 @@
+# services/prompt_builder.py
+import re
+from typing import Dict, List
+from core.config import Config
+from core.agents import PSYCHOLOGY_SYSTEM_PROMPT
+
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SESSION_LINE = re.compile(r"^\s*(?:Session \d+:|Earlier - )")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap BPE-style estimate - a word or symbol is ~1 token, long words ~4 chars per token"""
+    pieces = _PIECE_PATTERN.findall(text)
+    return sum(max(1, len(p) // 4) for p in pieces)
+
+
+def truncate_tokens(text: str, budget: int, keep_tail: bool = False) -> str:
+    """Cut text to about `budget` tokens, keeping the head (default) or the tail"""
+    if budget <= 0:
+        return ""
+    matches = list(_PIECE_PATTERN.finditer(text))
+    used = 0
+    if keep_tail:
+        for m in reversed(matches):
+            used += max(1, len(m.group()) // 4)
+            if used > budget:
+                return "..." + text[m.end():]
+        return text
+    for m in matches:
+        used += max(1, len(m.group()) // 4)
+        if used > budget:
+            return text[:m.start()].rstrip() + "..."
+    return text
+
+
+class PromptBuilder:
+    """Assembles chat messages under a token budget.
+
+    The static system prompt is always the first message, byte-for-byte
+    identical across requests, so provider-side prefix caching can reuse it.
+    Per-request context and the query follow it and are trimmed to fit.
+    """
+
+    def __init__(self, system_prompt: str, token_budget: int, query_token_limit: int):
+        self.system_prompt = system_prompt
+        self.system_tokens = estimate_tokens(system_prompt)
+        self.token_budget = token_budget
+        self.query_token_limit = query_token_limit
+
+    def build(self, query: str, context: str) -> List[Dict[str, str]]:
+        query = self.fit_query(query)
+        context_budget = self.token_budget - self.system_tokens - estimate_tokens(query)
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "system", "content": f"CONTEXT: {self.fit_context(context, context_budget)}"},
+            {"role": "user", "content": f"{query}\n\nProvide structured psychological response."}
+        ]
+
+    def fit_query(self, query: str) -> str:
+        """Long pasted text keeps its beginning and end"""
+        if estimate_tokens(query) <= self.query_token_limit:
+            return query
+        half = self.query_token_limit // 2
+        return f"{truncate_tokens(query, half)}\n[...]\n{truncate_tokens(query, half, keep_tail=True)}"
+
+    def fit_context(self, context: str, budget: int) -> str:
+        """Drop session lines oldest first, then hard-truncate"""
+        if estimate_tokens(context) <= budget:
+            return context
+
+        lines = context.splitlines()
+        session_lines = [i for i, line in enumerate(lines) if _SESSION_LINE.match(line)]
+        dropped = set()
+        for i in session_lines:
+            dropped.add(i)
+            trimmed = "\n".join(line for j, line in enumerate(lines) if j not in dropped)
+            if estimate_tokens(trimmed) <= budget:
+                return trimmed
+
+        remaining = "\n".join(line for j, line in enumerate(lines) if j not in dropped)
+        return truncate_tokens(remaining, budget)
+
+
+prompt_builder = PromptBuilder(PSYCHOLOGY_SYSTEM_PROMPT, Config.PROMPT_TOKEN_BUDGET, Config.QUERY_TOKEN_LIMIT)
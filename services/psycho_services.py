@@ -1,184 +1,512 @@
 # services/psycho_services.py
-from groq import Groq
-import openai
-from typing import Dict, Any, List
-import random
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Optional
 import re
 import asyncio
 import concurrent.futures
-from functools import lru_cache
-from .chat_services import memory_service
-from .youtube_services import get_youtube_recommendations_async
+import hashlib
+import logging
+import sys
+import time
+from collections import OrderedDict
+from .chat_services import ChatMemoryService
+from .youtube_services import get_youtube_recommendations_async, get_youtube_cache_stats
+from .video_index import TherapeuticVideoIndex
+from .llm_providers import LLMProviderPool
+from .model_router import ModelRouter
+from .query_classifier import query_classifier
+from .prompt_builder import prompt_builder
+from .persistence_queue import WriteBehindQueue
+from .sanitizer import StreamSanitizer
 from core.config import Config
-from core.agents import PSYCHOLOGY_SYSTEM_PROMPT
+from core.shared_state import SharedState
+from core.metrics import metrics, labels, STAGE_SECONDS, SANITIZER_REMOVED_CHARS, SANITIZER_UNCLOSED
+
+logger = logging.getLogger(__name__)
+
+# The model produced only reasoning (or nothing) - reported as an error, not answered
+EMPTY_RESPONSE_ERROR = "Model returned no answer after removing reasoning"
+
+class ResponseCache:
+    """TTL + LRU cache of model responses for repeated queries.
+
+    Entries are scoped by a hash of the context summary, so an answer is only
+    reused when the patient context is identical. Queries match after
+    normalization only. SimHash near-duplicates were tried and dropped:
+    paraphrases and negations ("I want to hurt myself" / "I don't want to
+    hurt myself") land at overlapping bit distances, so no threshold
+    separates them safely.
+    """
+
+    # Words that never change the answer - dropped from the key (negations are always kept)
+    FILLER_WORDS = frozenset(("a", "an", "the", "my", "so", "really", "just"))
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def normalize(cls, query: str) -> str:
+        """Lowercase, join contractions, drop punctuation and filler words"""
+        words = re.sub(r"[^\w\s]", " ", re.sub(r"['\u2019]", "", query.lower())).split()
+        return " ".join(w for w in words if w not in cls.FILLER_WORDS)
+
+    @staticmethod
+    def _scope(context: str) -> str:
+        return hashlib.blake2b(context.encode(), digest_size=16).hexdigest()
+
+    def get(self, query: str, context: str) -> Optional[Dict[str, Any]]:
+        """Cached response for this query/context"""
+        entry = self._live_entry((self._scope(context), self.normalize(query)))
+        if entry:
+            self.hits += 1
+            return entry["value"]
+        self.misses += 1
+        return None
+
+    def shared_key(self, query: str, context: str) -> str:
+        """Key for the cross-worker copy"""
+        digest = hashlib.blake2b(self.normalize(query).encode(), digest_size=16).hexdigest()
+        return f"response:{self._scope(context)}:{digest}"
+
+    def put(self, query: str, context: str, value: Dict[str, Any]):
+        scope = self._scope(context)
+        normalized = self.normalize(query)
+        key = (scope, normalized)
+        if key in self._entries:
+            self._remove(key)
+
+        size = sys.getsizeof(normalized) + sum(sys.getsizeof(v) for v in value.values())
+        self._entries[key] = {
+            "value": value,
+            "expires": time.monotonic() + self.ttl,
+            "size": size
+        }
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _live_entry(self, key: tuple) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        hits = self.hits + self.shared_hits
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "approx_bytes": self._bytes,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class BatchMemo:
+    """Per-batch memo so repeated queries classify and look up videos once"""
 
-class PsychologyService:
     def __init__(self):
-        self.config = Config()
-        self.groq_client = None
-        self.openai_client = None
+        self.classifications: Dict[str, tuple] = {}
+        self._videos: Dict[str, asyncio.Task] = {}
+
+    def classify(self, query: str) -> tuple:
+        key = ResponseCache.normalize(query)
+        if key not in self.classifications:
+            self.classifications[key] = query_classifier.classify(query)
+        return self.classifications[key]
+
+    async def videos(self, query: str, fetch) -> List[Dict]:
+        """Shared video lookup - one caller cancelling doesn't cancel the others"""
+        key = ResponseCache.normalize(query)
+        task = self._videos.get(key)
+        if task is None:
+            task = self._videos[key] = asyncio.create_task(fetch(query))
+        return await asyncio.shield(task)
+
+    def close(self):
+        for task in self._videos.values():
+            task.cancel()
+
+
+class PsychologyService:
+    def __init__(self, memory: ChatMemoryService, video_index: TherapeuticVideoIndex,
+                 shared_state: SharedState, config: Config = None):
+        self.config = config or Config()
+        self.memory = memory
+        self.video_index = video_index
+        self.shared_state = shared_state
         self.current_model = self.config.DEFAULT_MODEL
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
-
-        # Initialize clients with connection pooling
-        if self.config.GROQ_API_KEY:
-            self.groq_client = Groq(api_key=self.config.GROQ_API_KEY)
-
-        if self.config.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
-
-    @lru_cache(maxsize=100)
-    def _classify_query_fast(self, query_hash: str, query_lower: str) -> tuple[str, str]:
-        """Fast cached query classification"""
-        # Crisis keywords - highest priority
-        crisis_keywords = ['suicide', 'kill myself', 'end my life', 'hurt myself', 'self-harm', 'emergency']
-        if any(k in query_lower for k in crisis_keywords):
-            return "llama", "Crisis situation detected"
-        
-        # Complex condition keywords
-        complex_keywords = ['trauma', 'ptsd', 'bipolar', 'schizophrenia', 'personality disorder', 'addiction']
-        if any(k in query_lower for k in complex_keywords):
-            return "deepseek", "Complex psychological condition"
-
-        # Default rotation for general queries
-        return random.choice(["llama", "deepseek"]), "General concern"
-
-    def _select_optimal_model(self, query: str) -> tuple[str, str]:
-        """Optimized model selection with caching"""
-        query_lower = query.lower()
-        query_hash = str(hash(query_lower))
-        return self._classify_query_fast(query_hash, query_lower)
+        # Only memory operations run here - LLM calls use the async providers
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.config.THREAD_POOL_SIZE)
+        # Conversation writes are batched on their own thread, drained at shutdown
+        self.persistence = WriteBehindQueue(
+            "chat_memory",
+            self.memory.add_messages,
+            self.config.PERSIST_BATCH_SIZE,
+            self.config.PERSIST_FLUSH_INTERVAL
+        )
+
+        # Async clients sharing one pooled HTTP connection pool
+        self.providers = LLMProviderPool(self.config)
+        # Failover, hedging and circuit breaking across providers
+        self.router = ModelRouter(self.providers, self.config)
+
+        # Full responses for repeated queries under an identical context
+        self.response_cache = ResponseCache(
+            self.config.RESPONSE_CACHE_SIZE,
+            self.config.RESPONSE_CACHE_TTL
+        )
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """Scrape-time gauges for /metrics"""
+        metrics.gauge(
+            "psychohealer_executor_queue_depth", "Memory operations waiting for an executor thread",
+            lambda: self.executor._work_queue.qsize()
+        )
+        metrics.gauge(
+            "psychohealer_cache_hit_ratio", "Hit ratio per cache",
+            lambda: {
+                labels(cache="response"): self.response_cache.stats()["hit_rate"],
+                labels(cache="youtube"): get_youtube_cache_stats()["hit_rate"]
+            }
+        )
+        metrics.gauge(
+            "psychohealer_response_cache_bytes", "Approximate memory held by the response cache",
+            lambda: self.response_cache.stats()["approx_bytes"]
+        )
+        metrics.gauge(
+            "psychohealer_provider_in_flight", "In-flight completions per provider",
+            lambda: {labels(provider=name): p.in_flight for name, p in self.providers.providers.items()}
+        )
+        metrics.gauge(
+            "psychohealer_model_tokens_per_second", "EWMA streaming throughput per model",
+            lambda: {labels(model=m): st.tokens_per_sec for m, st in self.router.model_stats.items()}
+        )
+
+    def available_models(self) -> List[str]:
+        return self.providers.available_models()
+
+    def _select_optimal_model(self, query: str, memo: Optional[BatchMemo] = None) -> tuple[str, str]:
+        """Fixed routing for crisis/complex queries, latency-aware choice for the rest"""
+        category, reason = memo.classify(query) if memo else query_classifier.classify(query)
+
+        if category == "crisis":
+            return "llama", reason
+        if category == "complex":
+            return "deepseek", reason
+
+        # Choice depends on live stats, so it is made per request
+        model, how = self.router.choose_model(["llama", "deepseek"], category)
+        return model, f"{reason} - {how}"
 
     async def get_psychology_response_async(self, query: str, user_id: str) -> Dict[str, Any]:
         """Async main psychology response with parallel processing"""
+        with STAGE_SECONDS.time(stage="total"):
+            return await self._get_psychology_response_async(query, user_id)
+
+    async def process_batch_async(self, items: List[tuple], concurrency: int,
+                                  admit: Optional[Callable[[], Awaitable[Any]]] = None,
+                                  persist: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Run (query, user_id) items with bounded concurrency - yields results as they finish.
+
+        `admit` returns a ticket (with release()) held while an item runs; an
+        item it refuses is answered with an error. Without `persist`, items
+        ignore history and nothing is saved.
+        """
+        memo = BatchMemo()
+        results: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(items))
+
+        async def run_item(query: str, user_id: str) -> Dict[str, Any]:
+            try:
+                ticket = await admit() if admit else None
+            except Exception as e:
+                return self._error_response(user_id, str(e))
+            try:
+                with STAGE_SECONDS.time(stage="batch_item"):
+                    return await self._get_psychology_response_async(query, user_id, memo, persist)
+            finally:
+                if ticket:
+                    ticket.release()
+
+        async def worker():
+            # Workers share one iterator, so at most `concurrency` items run at once
+            for index, (query, user_id) in pending:
+                result = await run_item(query, user_id)
+                await results.put({"index": index, **result})
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            memo.close()
+
+    async def _get_psychology_response_async(self, query: str, user_id: str,
+                                             memo: Optional[BatchMemo] = None,
+                                             persist: bool = True) -> Dict[str, Any]:
         try:
             # Start parallel tasks immediately
-            selected_model, selection_reason = self._select_optimal_model(query)
-            
-            # Create tasks for parallel execution
-            context_task = asyncio.create_task(self._get_context_async(user_id))
+            selected_model, selection_reason = self._select_optimal_model(query, memo)
             
-            # Get context (fast operation)
-            context = await context_task
+            # Get context (fast operation) - stateless items answer without history
+            context = await self._get_context_async(user_id) if persist else ""
             
+            cached = await self._cached_response(query, context)
+            if cached:
+                if persist:
+                    self._schedule_save(user_id, query, cached)
+                return {**cached, "user_id": user_id}
+
             # Prepare optimized prompt
-            full_prompt = self._build_optimized_prompt(query, context)
+            messages = self._build_optimized_prompt(query, context)
             
             # Start AI response and video search in parallel
-            ai_task = asyncio.create_task(self._get_model_response_async(full_prompt, selected_model))
-            video_task = asyncio.create_task(self._get_therapeutic_videos_async(query))
+            ai_task = asyncio.create_task(self._get_model_response_async(messages, selected_model))
+            if memo:
+                video_task = asyncio.create_task(memo.videos(query, self._get_therapeutic_videos_async))
+            else:
+                video_task = asyncio.create_task(self._get_therapeutic_videos_async(query))
             
             # Wait for both to complete
-            ai_response, youtube_videos = await asyncio.gather(ai_task, video_task)
+            try:
+                (model_used, ai_response), youtube_videos = await asyncio.gather(ai_task, video_task)
+            finally:
+                # Errors and cancellation (client gone, batch cancelled) must not orphan either task
+                for task in (ai_task, video_task):
+                    if not task.done():
+                        task.cancel()
             
-            # Quick response cleaning
-            cleaned_response = self._clean_response_fast(ai_response)
-            
-            # Save to memory (non-blocking)
-            asyncio.create_task(self._save_memory_async(user_id, query, cleaned_response, {
-                "model_used": selected_model,
-                "videos_recommended": len(youtube_videos)
-            }))
+            # Strip reasoning blocks and preambles
+            with STAGE_SECONDS.time(stage="cleanup"):
+                sanitizer = StreamSanitizer()
+                cleaned_response = sanitizer.feed(ai_response) + sanitizer.flush()
+            self._record_sanitizer(sanitizer, model_used)
+            if not cleaned_response:
+                # Nothing but reasoning - an error, never cached or saved as an answer
+                raise ValueError(EMPTY_RESPONSE_ERROR)
 
-            return {
+            result = {
                 "response": cleaned_response,
                 "youtube_videos": youtube_videos,
-                "model_used": selected_model,
-                "model_selection_reason": selection_reason,
-                "user_id": user_id
+                "model_used": model_used,
+                "model_selection_reason": self._routing_reason(selected_model, model_used, selection_reason)
             }
+            self._cache_response(query, context, result)
+
+            # Save to memory (non-blocking)
+            if persist:
+                self._schedule_save(user_id, query, result)
+
+            return {**result, "user_id": user_id}
 
         except Exception as e:
             return self._error_response(user_id, str(e))
 
+    async def stream_psychology_response_async(self, query: str, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Async streaming psychology response - yields events as tokens arrive"""
+        started = time.perf_counter()
+        try:
+            async for event in self._stream_psychology_response_async(query, user_id):
+                yield event
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="total_stream")
+
+    async def _stream_psychology_response_async(self, query: str, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        selected_model, selection_reason = self._select_optimal_model(query)
+
+        video_task = None
+        try:
+            context = await self._get_context_async(user_id)
+
+            cached = await self._cached_response(query, context)
+            if cached:
+                yield {"event": "meta", "data": {
+                    "model_used": cached["model_used"],
+                    "model_selection_reason": cached["model_selection_reason"],
+                    "user_id": user_id
+                }}
+                yield {"event": "token", "data": {"text": cached["response"]}}
+                yield {"event": "videos", "data": {"youtube_videos": cached["youtube_videos"]}}
+                self._schedule_save(user_id, query, cached)
+                yield {"event": "done", "data": {
+                    "response": cached["response"],
+                    "model_used": cached["model_used"],
+                    "user_id": user_id
+                }}
+                return
+
+            messages = self._build_optimized_prompt(query, context)
+
+            # Video search runs while tokens are streaming
+            video_task = asyncio.create_task(self._get_therapeutic_videos_async(query))
+
+            sanitizer = StreamSanitizer()
+            parts = []
+            model_used = None
+            cleanup_seconds = 0.0
+            model_started = time.perf_counter()
+            async for model_used_chunk, chunk in self._stream_model_response_async(messages, selected_model):
+                if model_used is None:
+                    # Announce the model that actually won routing
+                    model_used = model_used_chunk
+                    yield {"event": "meta", "data": {
+                        "model_used": model_used,
+                        "model_selection_reason": self._routing_reason(selected_model, model_used, selection_reason),
+                        "user_id": user_id
+                    }}
+                cleanup_started = time.perf_counter()
+                text = sanitizer.feed(chunk)
+                cleanup_seconds += time.perf_counter() - cleanup_started
+                if text:
+                    parts.append(text)
+                    yield {"event": "token", "data": {"text": text}}
+
+            text = sanitizer.flush()
+            self._record_sanitizer(sanitizer, model_used or selected_model)
+            STAGE_SECONDS.observe(time.perf_counter() - model_started, stage="model_stream")
+            STAGE_SECONDS.observe(cleanup_seconds, stage="cleanup")
+            if text:
+                parts.append(text)
+                yield {"event": "token", "data": {"text": text}}
+
+            if not parts:
+                raise ValueError(EMPTY_RESPONSE_ERROR)
+
+            youtube_videos = await video_task
+            yield {"event": "videos", "data": {"youtube_videos": youtube_videos}}
+
+            result = {
+                "response": "".join(parts),
+                "youtube_videos": youtube_videos,
+                "model_used": model_used,
+                "model_selection_reason": self._routing_reason(selected_model, model_used, selection_reason)
+            }
+            self._cache_response(query, context, result)
+            self._schedule_save(user_id, query, result)
+
+            yield {"event": "done", "data": {
+                "response": result["response"],
+                "model_used": model_used,
+                "user_id": user_id
+            }}
+
+        except Exception as e:
+            yield {"event": "error", "data": self._error_response(user_id, str(e))}
+        finally:
+            # Also reached on client disconnect (GeneratorExit/CancelledError), which skips except
+            if video_task and not video_task.done():
+                video_task.cancel()
+
     def get_psychology_response(self, query: str, user_id: str) -> Dict[str, Any]:
         """Sync wrapper for backward compatibility"""
         return asyncio.run(self.get_psychology_response_async(query, user_id))
 
-    def _build_optimized_prompt(self, query: str, context: str) -> str:
-        """Build streamlined prompt - reduce token count"""
-        return f"""{PSYCHOLOGY_SYSTEM_PROMPT}
+    async def _cached_response(self, query: str, context: str) -> Optional[Dict[str, Any]]:
+        """Local cache first, then answers other workers cached under the same context"""
+        cached = self.response_cache.get(query, context)
+        if cached is None and self.shared_state.shared and self.response_cache.max_entries > 0:
+            key = self.response_cache.shared_key(query, context)
+            try:
+                cached = await asyncio.get_running_loop().run_in_executor(self.executor, self.shared_state.get, key)
+            except Exception as e:
+                logger.warning(f"Shared cache error: {e}")
+                return None
+            if cached:
+                self.response_cache.shared_hits += 1
+                self.response_cache.put(query, context, cached)
+        return cached
+
+    def _cache_response(self, query: str, context: str, result: Dict[str, Any]):
+        """Cache locally and, off the request path, for the other workers"""
+        self.response_cache.put(query, context, result)
+        if self.shared_state.shared and self.response_cache.max_entries > 0:
+            self.executor.submit(self._share_response, self.response_cache.shared_key(query, context), result)
 
-CONTEXT: {context}
-QUERY: {query}
+    def _share_response(self, key: str, result: Dict[str, Any]):
+        try:
+            self.shared_state.set(key, result, self.config.RESPONSE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Shared cache error: {e}")
 
-Provide structured psychological response."""
+    def _build_optimized_prompt(self, query: str, context: str) -> List[Dict[str, str]]:
+        """Token-budgeted messages - static system prompt first for prefix caching"""
+        return prompt_builder.build(query, context)
 
     async def _get_context_async(self, user_id: str) -> str:
         """Async context retrieval - lightweight"""
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, memory_service.get_context_summary, user_id)
-
-    @lru_cache(maxsize=50)
-    def _clean_response_fast(self, response: str) -> str:
-        """Optimized response cleaning with caching"""
-        # Single regex pass for multiple patterns
-        pattern = r'(Let me think.*?\n|First, I.*?\n|Based on my analysis.*?\n|I need to consider.*?\n|My reasoning is.*?\n|\[REASONING:.*?\]|\[MODEL SELECTION:.*?\]|<thinking>.*?</thinking>|<analysis>.*?</analysis>)'
-        response = re.sub(pattern, '', response, flags=re.IGNORECASE | re.DOTALL)
-        return re.sub(r'\n\s*\n', '\n\n', response.strip())
-
-    async def _get_model_response_async(self, prompt: str, model: str) -> str:
-        """Async model response with optimized parameters"""
-        try:
-            loop = asyncio.get_event_loop()
-            
-            if model == "openai" and self.openai_client:
-                return await loop.run_in_executor(
-                    self.executor,
-                    self._call_openai,
-                    prompt
-                )
-            elif self.groq_client and model in ["llama", "deepseek"]:
-                return await loop.run_in_executor(
-                    self.executor,
-                    self._call_groq,
-                    prompt,
-                    model
-                )
-            else:
-                return "Model not available."
-        except Exception as e:
-            return f"Error: {str(e)}"
-
-    def _call_openai(self, prompt: str) -> str:
-        """Optimized OpenAI call"""
-        response = self.openai_client.chat.completions.create(
-            model=self.config.MODELS["openai"],
-            messages=[{"role": "system", "content": prompt}],
-            max_tokens=1500,  # Reduced for faster response
-            temperature=0.5,  # Reduced for consistency
-            stream=False
-        )
-        return response.choices[0].message.content.strip()
-
-    def _call_groq(self, prompt: str, model: str) -> str:
-        """Optimized Groq call"""
-        response = self.groq_client.chat.completions.create(
-            messages=[{"role": "system", "content": prompt}],
-            model=self.config.MODELS[model],
-            max_tokens=1500,  # Reduced for faster response
-            temperature=0.5,  # Reduced for consistency
-        )
-        return response.choices[0].message.content.strip()
+        with STAGE_SECONDS.time(stage="context"):
+            return await loop.run_in_executor(self.executor, self.memory.get_context_summary, user_id)
+
+    async def _get_model_response_async(self, messages: List[Dict[str, str]], model: str) -> tuple[str, str]:
+        """Async model response as (model_used, text) - fails over across providers"""
+        with STAGE_SECONDS.time(stage="model"):
+            return await self.router.complete(messages, model)
+
+    async def _stream_model_response_async(self, messages: List[Dict[str, str]], model: str) -> AsyncIterator[tuple[str, str]]:
+        """Async (model_used, text) stream - fails over and hedges across providers"""
+        async for model_used, text in self.router.stream(messages, model):
+            yield model_used, text
+
+    @staticmethod
+    def _record_sanitizer(sanitizer: StreamSanitizer, model_used: str):
+        """Export what reasoning cleanup did to one finished response"""
+        SANITIZER_REMOVED_CHARS.inc(sanitizer.removed, model=model_used)
+        if sanitizer.unclosed:
+            SANITIZER_UNCLOSED.inc(model=model_used)
+            logger.warning(f"{model_used} response ended inside an unclosed reasoning block - returned as is")
+
+    @staticmethod
+    def _routing_reason(selected_model: str, model_used: str, selection_reason: str) -> str:
+        if model_used == selected_model:
+            return selection_reason
+        return f"{selection_reason} (failover from {selected_model})"
 
     async def _get_therapeutic_videos_async(self, query: str) -> List[Dict]:
-        """Async video search with reduced scope"""
+        """Local index first, live YouTube search only as a fallback"""
         try:
-            # Simplified video search - only one query for speed
-            video_query = f"psychology therapy {query[:50]}"  # Limit query length
-            videos = await get_youtube_recommendations_async(video_query, max_results=4)
-            return videos[:4]  # Limit to 4 videos for faster response
+            with STAGE_SECONDS.time(stage="videos"):
+                videos = self.video_index.search(query, max_results=4)
+                if videos or not self.config.VIDEO_INDEX_LIVE_FALLBACK:
+                    return videos
+
+                # Simplified video search - only one query for speed
+                video_query = f"psychology therapy {query[:50]}"  # Limit query length
+                videos = await get_youtube_recommendations_async(video_query, max_results=4, shared=self.shared_state)
+                return videos[:4]  # Limit to 4 videos for faster response
         except Exception:
             return []
 
-    async def _save_memory_async(self, user_id: str, query: str, response: str, metadata: Dict):
-        """Async memory saving"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            self.executor,
-            memory_service.add_message,
-            user_id, query, response, metadata
-        )
+    def _schedule_save(self, user_id: str, query: str, result: Dict[str, Any]):
+        """Queue the exchange for write-behind persistence without blocking the response"""
+        self.persistence.submit((user_id, query, result["response"], {
+            "model_used": result["model_used"],
+            "videos_recommended": len(result["youtube_videos"])
+        }))
 
     def _error_response(self, user_id: str, error: str) -> Dict[str, Any]:
         """Quick error response"""
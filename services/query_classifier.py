@@ -0,0 +1,87 @@
+# services/query_classifier.py
+import json
+import re
+from typing import Dict, List, Tuple
+from core.config import Config
+
+_END = ""
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a keyword trie - shared prefixes are matched once, longest keyword wins"""
+    alternatives = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != _END]
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return f"(?:{body})?" if _END in node else body
+
+
+class QueryClassifier:
+    """Keyword classifier compiled into a single regex automaton.
+
+    The keywords of every category are merged into one trie-shaped pattern
+    wrapped in a lookahead, so a single finditer pass reports a match at every
+    position where any keyword starts (overlaps included). Keywords that are
+    prefixes of a longer match are credited through the prefix table built at
+    compile time. Categories are listed in priority order.
+    """
+
+    def __init__(self, categories: Dict[str, Dict]):
+        self.categories = categories
+        self.priority = list(categories)
+
+        keyword_categories: Dict[str, set] = {}
+        for name, spec in categories.items():
+            for keyword in spec["keywords"]:
+                keyword_categories.setdefault(keyword.lower(), set()).add(name)
+
+        trie: Dict = {}
+        for keyword in keyword_categories:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[_END] = keyword
+
+        # A match also counts for every keyword that is a prefix of it
+        self._prefix_hits: Dict[str, Dict[str, List[str]]] = {}
+        for keyword in keyword_categories:
+            hits: Dict[str, List[str]] = {}
+            node = trie
+            for ch in keyword:
+                node = node[ch]
+                prefix = node.get(_END)
+                if prefix:
+                    for name in keyword_categories[prefix]:
+                        hits.setdefault(name, []).append(prefix)
+            self._prefix_hits[keyword] = hits
+
+        self.keyword_count = len(keyword_categories)
+        self._pattern = re.compile(f"(?=({_trie_pattern(trie)}))") if trie else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "QueryClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """All matched keywords per category, in one pass over the text"""
+        found: Dict[str, List[str]] = {}
+        if self._pattern is None:
+            return found
+        for m in self._pattern.finditer(text.lower()):
+            for name, keywords in self._prefix_hits[m.group(1)].items():
+                bucket = found.setdefault(name, [])
+                bucket.extend(k for k in keywords if k not in bucket)
+        return found
+
+    def classify(self, text: str) -> Tuple[str, str]:
+        """Highest-priority matched category and its reason, or general"""
+        found = self.match(text)
+        for name in self.priority:
+            if name in found:
+                return name, self.categories[name]["reason"]
+        return "general", "General concern"
+
+
+# Compiled once at import
+query_classifier = QueryClassifier.from_file(Config.CLASSIFIER_KEYWORDS_PATH)
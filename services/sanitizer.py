@@ -0,0 +1,212 @@
+# services/sanitizer.py
+import re
+from typing import List, Optional, Tuple
+
+# Reasoning blocks - everything up to the matching close tag is dropped (<think> is deepseek-r1's)
+BLOCK_TAGS = ("thinking", "analysis", "think")
+# Inline markers dropped up to and including the closing bracket
+BRACKET_MARKERS = ("[reasoning:", "[model selection:")
+# Lines that start with one of these are reasoning preambles and dropped through their newline
+PREAMBLES = ("let me think", "first, i", "based on my analysis", "i need to consider", "my reasoning is")
+
+_OPENERS: List[Tuple[str, str]] = (
+    [(f"<{tag}>", f"</{tag}>") for tag in BLOCK_TAGS]
+    + [(marker, "]") for marker in BRACKET_MARKERS]
+)
+# A close tag without its opener (e.g. a template that pre-fills <think>) is just dropped
+_STRAY_CLOSERS = tuple(f"</{tag}>" for tag in BLOCK_TAGS)
+_MARKERS = tuple(opener for opener, _ in _OPENERS) + _STRAY_CLOSERS
+_CLOSE_PATTERNS = {close: re.compile(re.escape(close), re.IGNORECASE) for _, close in _OPENERS}
+_WHITESPACE = re.compile(r"\s+")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+# Text up to the next newline or possible marker, ending on a visible character
+_VISIBLE = re.compile(r"[^\n<\[]*[^\s<\[]")
+
+_TEXT, _SKIP_UNTIL, _SKIP_LINE = range(3)
+
+
+def _word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class StreamSanitizer:
+    """Removes model reasoning from a token stream, chunk by chunk.
+
+    Drops <thinking>, <analysis> and <think> blocks, [REASONING: ...] and
+    [MODEL SELECTION: ...] markers and preamble lines such as "Let me
+    think...". The response is trimmed and runs of blank lines collapse to
+    one. Only text that could still start a marker is held back, at most
+    `lookahead` characters. The text of an open block is kept until its
+    close marker arrives. If the stream ends first (e.g. deepseek-r1 cut off
+    by max_tokens inside <think>), flush() emits that text as is and sets
+    `unclosed`, instead of silently dropping the rest of the response.
+    """
+
+    lookahead = max(len(m) for m in _MARKERS + PREAMBLES) + 1
+
+    def __init__(self):
+        self._held = ""
+        self._mode = _TEXT
+        self._close = ""
+        self._started = False  # Any visible text emitted yet
+        self._line_start = True
+        # Pending whitespace run: text before its first newline, newline count, text after the last
+        self._ws_before = ""
+        self._ws_newlines = 0
+        self._ws_after = ""
+        self._skipped: List[str] = []  # Raw text of the open block, restored if it never closes
+        self.removed = 0  # Characters dropped as reasoning
+        self.unclosed = False  # A block was still open when the stream ended
+
+    def feed(self, chunk: str) -> str:
+        """Add a streamed chunk, return the text that is safe to emit"""
+        return self._process(self._held + chunk, final=False)
+
+    def flush(self) -> str:
+        """Emit whatever is still held once the stream has ended - trailing whitespace is dropped"""
+        text = self._process(self._held, final=True)
+        if self._mode == _SKIP_UNTIL:
+            text += self._restore_unclosed()
+        return text
+
+    def _restore_unclosed(self) -> str:
+        """Emit a block that never closed as plain text rather than lose it"""
+        raw = "".join(self._skipped)
+        self._skipped = []
+        self._mode = _TEXT
+        self.removed -= len(raw)
+        self.unclosed = True
+        out: List[str] = []
+        visible = _BLANK_LINES.sub("\n\n", raw).rstrip()
+        if visible:
+            self._emit(visible, out)
+        return "".join(out)
+
+    def _process(self, data: str, final: bool) -> str:
+        self._held = ""
+        out: List[str] = []
+        i, end = 0, len(data)
+        while i < end:
+            if self._mode == _SKIP_UNTIL:
+                match = _CLOSE_PATTERNS[self._close].search(data, i)
+                if match is None:
+                    # Keep just enough of the tail to spot a close marker split across chunks
+                    keep = 0 if final else min(len(self._close) - 1, end - i)
+                    self._skipped.append(data[i:end - keep])
+                    self.removed += end - i - keep
+                    self._held = data[end - keep:]
+                    return "".join(out)
+                self.removed += match.end() - i
+                i = match.end()
+                self._mode = _TEXT
+                self._skipped = []
+                continue
+
+            if self._mode == _SKIP_LINE:
+                found = data.find("\n", i)
+                if found == -1:
+                    self.removed += end - i
+                    return "".join(out)
+                self.removed += found + 1 - i
+                i = found + 1
+                self._mode = _TEXT
+                self._line_start = True
+                continue
+
+            char = data[i]
+            if char.isspace():
+                run = _WHITESPACE.match(data, i).group()
+                self._add_whitespace(run)
+                i += len(run)
+                continue
+
+            window = data[i:i + self.lookahead].lower() if self._line_start or char in "<[" else ""
+            if self._line_start:
+                decision = self._match_preamble(window, final)
+                if decision is None:
+                    self._held = data[i:]
+                    return "".join(out)
+                if decision:
+                    self._mode = _SKIP_LINE
+                    continue
+
+            if char in "<[":
+                decision = self._match_marker(window, final)
+                if decision is None:
+                    self._held = data[i:]
+                    return "".join(out)
+                if decision:
+                    marker, close = decision
+                    self.removed += len(marker)
+                    i += len(marker)
+                    if close:
+                        self._mode, self._close = _SKIP_UNTIL, close
+                        self._skipped = [data[i - len(marker):i]]
+                    continue
+                self._emit(char, out)
+                i += 1
+                continue
+
+            text = _VISIBLE.match(data, i).group()
+            self._emit(text, out)
+            i += len(text)
+        return "".join(out)
+
+    def _match_preamble(self, window: str, final: bool) -> Optional[bool]:
+        """True for a preamble, False if not one, None if more text is needed to tell"""
+        for phrase in PREAMBLES:
+            if window.startswith(phrase):
+                after = window[len(phrase):len(phrase) + 1]
+                if after:
+                    if not _word_char(after):
+                        return True
+                elif final:
+                    return True
+                else:
+                    return None
+            elif phrase.startswith(window) and not final:
+                return None
+        return False
+
+    def _match_marker(self, window: str, final: bool):
+        """(marker, close) for a marker, False if not one, None if more text is needed"""
+        for opener, close in _OPENERS:
+            if window.startswith(opener):
+                return opener, close
+        for closer in _STRAY_CLOSERS:
+            if window.startswith(closer):
+                return closer, ""
+        if not final and any(m.startswith(window) for m in _MARKERS):
+            return None
+        return False
+
+    def _add_whitespace(self, run: str):
+        newlines = run.count("\n")
+        if newlines:
+            if not self._ws_newlines:
+                self._ws_before += run[:run.index("\n")]
+            self._ws_newlines += newlines
+            self._ws_after = run[run.rindex("\n") + 1:]
+            self._line_start = True
+        elif self._ws_newlines:
+            self._ws_after += run
+        else:
+            self._ws_before += run
+
+    def _emit(self, text: str, out: List[str]):
+        # Whitespace is only written once visible text follows it, so the response ends trimmed
+        if self._started:
+            if self._ws_newlines:
+                out.append(self._ws_before + ("\n\n" if self._ws_newlines > 1 else "\n") + self._ws_after)
+            else:
+                out.append(self._ws_before)
+        self._started = True
+        self._line_start = False
+        self._ws_before, self._ws_newlines, self._ws_after = "", 0, ""
+        out.append(text)
+
+
+def sanitize(text: str) -> str:
+    """Sanitize a complete response - the same single pass as a stream"""
+    sanitizer = StreamSanitizer()
+    return sanitizer.feed(text) + sanitizer.flush()
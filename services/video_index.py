@@ -0,0 +1,246 @@
+# services/video_index.py
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import socket
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from core.config import Config
+from core.shared_state import SharedState
+from .youtube_services import get_youtube_recommendations
+
+logger = logging.getLogger(__name__)
+
+# Shared-state keys: the refresher's lease, and the latest index for the other workers
+_LEASE_KEY = "video_index:lease"
+_REFRESHED_KEY = "video_index:refreshed"
+_SNAPSHOT_KEY = "video_index:videos"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a about am an and are as at be been but by can d do for from have how i if in
+is it its ll m me my of on or re s so t that the this to ve was what when with
+you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, naive plural folding"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class _IndexData:
+    """Immutable snapshot - swapped in whole on refresh so searches never lock"""
+
+    def __init__(self, videos: List[Dict], k1: float = 1.5, b: float = 0.75, title_boost: int = 2):
+        self.videos = videos
+        doc_terms = []
+        for video in videos:
+            terms = tokenize(video.get("title", "")) * title_boost
+            terms += tokenize(video.get("description", ""))
+            terms += tokenize(video.get("channel", ""))
+            doc_terms.append(Counter(terms))
+
+        lengths = np.array([sum(c.values()) for c in doc_terms], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+
+        postings: Dict[str, List[tuple]] = {}
+        for doc, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        # Term-major postings in flat arrays (CSC layout) with BM25 weights precomputed
+        self.vocabulary: Dict[str, int] = {}
+        offsets = [0]
+        docs: List[int] = []
+        weights: List[float] = []
+        n_docs = len(videos)
+        for term, entries in postings.items():
+            self.vocabulary[term] = len(offsets) - 1
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            for doc, tf in entries:
+                norm = k1 * (1 - b + b * lengths[doc] / avg_length)
+                docs.append(doc)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+            offsets.append(len(docs))
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.docs = np.array(docs, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+
+
+class TherapeuticVideoIndex:
+    """Local BM25 index of curated therapeutic videos.
+
+    Loaded from a JSON file and periodically rebuilt from the YouTube API for
+    the topics in Config.VIDEO_INDEX_TOPICS. Searches touch only in-memory
+    arrays, so recommendations need no network round-trip.
+
+    Only one worker refreshes: the holder of a lease in shared state, or of
+    a lock on the index file when state is process-local. The others pick up
+    its result from shared state or the file.
+    """
+
+    def __init__(self, path: str, topics: List[str], state: SharedState):
+        self.path = path
+        self.topics = topics
+        self.state = state
+        self._data = _IndexData([])
+        self.last_refresh: Optional[float] = None
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock_file = None
+        self.refresher = False  # This worker held the refresher role at its last poll
+
+    def __len__(self) -> int:
+        return len(self._data.videos)
+
+    def load(self):
+        """Load the index file if present"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                videos = json.load(f)
+            self._data = _IndexData(videos)
+            self.last_refresh = os.path.getmtime(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load video index {self.path}: {e}")
+
+    def search(self, query: str, max_results: int = 4, min_score: float = 1.0) -> List[Dict]:
+        """Top BM25 matches for the query"""
+        data = self._data
+        if not data.videos:
+            return []
+
+        term_ids = {data.vocabulary[t] for t in tokenize(query) if t in data.vocabulary}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(data.videos), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = data.offsets[term_id], data.offsets[term_id + 1]
+            # Each doc appears at most once per term, so fancy-index add is safe
+            scores[data.docs[start:end]] += data.weights[start:end]
+
+        k = min(max_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [data.videos[i] for i in top if scores[i] >= min_score]
+
+    def refresh(self, per_topic: int = 25):
+        """Rebuild from live YouTube searches and persist - blocking"""
+        videos: Dict[str, Dict] = {}
+        for topic in self.topics:
+            for video in get_youtube_recommendations(topic, max_results=per_topic):
+                videos.setdefault(video["video_id"], {**video, "topic": topic})
+
+        if not videos:
+            logger.warning("Video index refresh returned no videos - keeping current index")
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(videos.values()), f)
+        os.replace(tmp_path, self.path)
+
+        self._data = _IndexData(list(videos.values()))
+        self.last_refresh = os.path.getmtime(self.path)
+        if self.state.shared:
+            self.state.set(_SNAPSHOT_KEY, list(videos.values()))
+            self.state.set(_REFRESHED_KEY, self.last_refresh)
+        logger.info(f"Video index refreshed: {len(videos)} videos")
+
+    def sync(self):
+        """Pick up an index another worker refreshed - blocking"""
+        if self.state.shared:
+            refreshed = self.state.get(_REFRESHED_KEY)
+            if refreshed and refreshed > (self.last_refresh or 0):
+                videos = self.state.get(_SNAPSHOT_KEY)
+                if videos:
+                    self._data = _IndexData(videos)
+                    self.last_refresh = refreshed
+        elif os.path.exists(self.path) and os.path.getmtime(self.path) > (self.last_refresh or 0):
+            self.load()
+
+    def _is_refresher(self, lease_ttl: float) -> bool:
+        """Take or renew the refresher role - blocking"""
+        if self.state.shared:
+            now = time.time()
+
+            def claim(lease):
+                if lease and lease["owner"] != self._owner and lease["expires"] > now:
+                    return lease
+                return {"owner": self._owner, "expires": now + lease_ttl}
+            return self.state.update(_LEASE_KEY, claim)["owner"] == self._owner
+
+        # Process-local state - workers on this host elect through a lock on the index file
+        if self._lock_file is None:
+            try:
+                import fcntl
+            except ImportError:
+                return True  # No flock on this platform - every worker refreshes
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lock_file = open(f"{self.path}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def _resign(self):
+        """Give up the refresher role so another worker can take it straight away"""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        if self.state.shared:
+            self.state.update(_LEASE_KEY, lambda lease: (
+                {**lease, "expires": 0} if lease and lease["owner"] == self._owner else lease
+            ))
+
+    async def run_refresh_loop(self, interval: float, poll: float = 60.0):
+        """Every poll seconds, pick up peers' refreshes and refresh if elected and the index is stale"""
+        loop = asyncio.get_running_loop()
+        attempted = 0.0  # A failed refresh waits a full interval too, sparing the API quota
+        try:
+            while True:
+                try:
+                    await loop.run_in_executor(None, self.sync)
+                    # The lease outlives a few missed polls, so a slow refresh doesn't hand it over
+                    self.refresher = await loop.run_in_executor(None, self._is_refresher, poll * 3)
+                    if self.refresher and time.time() - max(self.last_refresh or 0, attempted) >= interval:
+                        attempted = time.time()
+                        await loop.run_in_executor(None, self.refresh)
+                except Exception as e:
+                    logger.error(f"Video index refresh failed: {e}")
+                await asyncio.sleep(poll)
+        finally:
+            self.refresher = False
+            self._resign()
+
+    def stats(self) -> Dict:
+        return {
+            "videos": len(self),
+            "terms": len(self._data.vocabulary),
+            "last_refresh": self.last_refresh,
+            "refresher": self.refresher
+        }
+
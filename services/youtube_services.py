@@ -1,26 +1,48 @@
 # services/youtube_services.py
-from googleapiclient.discovery import build
-import aiohttp
 import asyncio
-from functools import lru_cache
+import logging
+import threading
+import time
+from collections import OrderedDict
 from core.config import Config
-from typing import List, Dict
+from core.shared_state import SharedState
+from typing import List, Dict, Optional, Tuple
 
-# Cache for YouTube API client
-_youtube_client = None
+logger = logging.getLogger(__name__)
+
+# YouTube API client per thread - the underlying httplib2.Http is not thread-safe
+_youtube_clients = threading.local()
+
+# Search results: key -> (expires_at, videos); LRU-ordered
+_results_cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict]]]" = OrderedDict()
+# Searches currently running: key -> shared fetch task
+_inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+_cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "negative_hits": 0, "shared_hits": 0}
 
 def get_youtube_client():
-    """Singleton YouTube client to avoid repeated initialization"""
-    global _youtube_client
-    if _youtube_client is None:
+    """Per-thread YouTube client, built once per executor thread"""
+    client = getattr(_youtube_clients, "client", None)
+    if client is None:
         config = Config()
         if config.YOUTUBE_API_KEY:
-            _youtube_client = build('youtube', 'v3', developerKey=config.YOUTUBE_API_KEY, cache_discovery=False)
-    return _youtube_client
+            # Imported on first use - discovery is slow to import and only needed for live search
+            from googleapiclient.discovery import build
+            client_options = {"api_endpoint": config.YOUTUBE_API_ENDPOINT} if config.YOUTUBE_API_ENDPOINT else None
+            client = _youtube_clients.client = build(
+                'youtube', 'v3',
+                developerKey=config.YOUTUBE_API_KEY,
+                cache_discovery=False,
+                client_options=client_options
+            )
+    return client
+
+def warm_up():
+    """Import the client library ahead of the first live search - blocking"""
+    if Config.YOUTUBE_API_KEY:
+        import googleapiclient.discovery  # noqa: F401
 
-@lru_cache(maxsize=100)
 def get_youtube_recommendations(search_query: str, max_results: int = 4) -> List[Dict]:
-    """Cached YouTube video recommendations - reduced results for speed"""
+    """Blocking YouTube search - use the async variant for caching and coalescing"""
     client = get_youtube_client()
     
     if not client:
@@ -58,8 +80,95 @@ def get_youtube_recommendations(search_query: str, max_results: int = 4) -> List
         print(f"YouTube API Error: {e}")
         return []
 
-async def get_youtube_recommendations_async(search_query: str, max_results: int = 4) -> List[Dict]:
-    """Async wrapper for YouTube recommendations"""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, get_youtube_recommendations, search_query, max_results)
+def _cache_key(search_query: str, max_results: int) -> Tuple[str, int]:
+    return " ".join(search_query.lower().split()), max_results
+
+def _result_ttl(videos: List[Dict]) -> float:
+    """Empty results expire sooner (negative caching)"""
+    return Config.YOUTUBE_CACHE_TTL if videos else Config.YOUTUBE_NEGATIVE_CACHE_TTL
+
+def _store_result(key: Tuple[str, int], videos: List[Dict]):
+    _results_cache[key] = (time.monotonic() + _result_ttl(videos), videos)
+    _results_cache.move_to_end(key)
+    while len(_results_cache) > Config.CACHE_SIZE:
+        _results_cache.popitem(last=False)
+
+def _shared_key(key: Tuple[str, int]) -> str:
+    return f"youtube:{key[1]}:{key[0]}"
+
+def _shared_lookup(shared: SharedState, key: Tuple[str, int]):
+    """Result another worker already fetched - None when absent or the backend is down"""
+    try:
+        return shared.get(_shared_key(key))
+    except Exception as e:
+        logger.warning(f"Shared cache error: {e}")
+        return None
+
+def _shared_store(shared: SharedState, key: Tuple[str, int], videos: List[Dict]):
+    try:
+        shared.set(_shared_key(key), videos, _result_ttl(videos))
+    except Exception as e:
+        logger.warning(f"Shared cache error: {e}")
+
+async def _fetch_and_store(key: Tuple[str, int], search_query: str, max_results: int,
+                           shared: Optional[SharedState]) -> List[Dict]:
+    """Single shared fetch for every caller waiting on this key"""
+    try:
+        loop = asyncio.get_running_loop()
+        # With a cross-process backend, other workers' results are checked before searching
+        if shared and shared.shared:
+            videos = await loop.run_in_executor(None, _shared_lookup, shared, key)
+            if videos is not None:
+                _cache_stats["shared_hits"] += 1
+                _store_result(key, videos)
+                return videos
+
+        videos = await loop.run_in_executor(None, get_youtube_recommendations, search_query, max_results)
+        _store_result(key, videos)
+        if shared and shared.shared:
+            await loop.run_in_executor(None, _shared_store, shared, key, videos)
+        return videos
+    finally:
+        _inflight.pop(key, None)
+
+async def get_youtube_recommendations_async(search_query: str, max_results: int = 4,
+                                            shared: Optional[SharedState] = None) -> List[Dict]:
+    """Async YouTube recommendations - TTL cached, concurrent identical searches share one fetch.
+
+    With a cross-process `shared` state, results fetched by other workers are reused.
+    """
+    key = _cache_key(search_query, max_results)
+
+    cached = _results_cache.get(key)
+    if cached:
+        expires_at, videos = cached
+        if expires_at > time.monotonic():
+            _results_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            if not videos:
+                _cache_stats["negative_hits"] += 1
+            return list(videos)
+        del _results_cache[key]
+
+    task = _inflight.get(key)
+    if task:
+        _cache_stats["coalesced"] += 1
+    else:
+        _cache_stats["misses"] += 1
+        task = asyncio.create_task(_fetch_and_store(key, search_query, max_results, shared))
+        _inflight[key] = task
+
+    # Shield so one caller being cancelled doesn't cancel the fetch for the others
+    return list(await asyncio.shield(task))
 
+def get_youtube_cache_stats() -> Dict:
+    """Search cache counters for the status endpoint"""
+    lookups = _cache_stats["hits"] + _cache_stats["misses"] + _cache_stats["coalesced"]
+    return {
+        **_cache_stats,
+        "entries": len(_results_cache),
+        "in_flight": len(_inflight),
+        "hit_rate": round(
+            (_cache_stats["hits"] + _cache_stats["coalesced"] + _cache_stats["shared_hits"]) / lookups, 4
+        ) if lookups else 0.0
+    }
@@ -2,9 +2,14 @@
 
 import logging
 import asyncio
+import json
+import time
+from contextlib import aclosing, nullcontext
 import aiohttp
-from telegram import Update, BotCommand
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
+from typing import AsyncIterator, Awaitable, Dict, List, Tuple
+from telegram import Update, BotCommand, Message
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import ApplicationBuilder, BaseUpdateProcessor, CommandHandler, MessageHandler, ContextTypes, filters
 from core.config import Config
 
 # Configure logging
@@ -12,20 +17,304 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
+# httpx logs every Bot API call at INFO - too noisy at webhook volumes
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-class PsychoBot:
-    def __init__(self):
-        self.api_url = f"{Config.API_BASE_URL}/api/v1/psychology/chat"
+
+async def sse_events(response: aiohttp.ClientResponse) -> AsyncIterator[Tuple[str, dict]]:
+    """Parse (event, data) pairs from a Server-Sent Events response"""
+    event, data = "message", []
+    async for raw in response.content:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+def split_message(text: str, limit: int) -> List[str]:
+    """Split text into Telegram-sized parts, preferring paragraph then line breaks.
+
+    Each part depends only on the text before its end, so a growing stream
+    never changes parts that were already sent.
+    """
+    parts = []
+    while len(text) > limit:
+        window = text[:limit]
+        cut = window.rfind("\n\n")
+        if cut < limit // 2:
+            cut = window.rfind("\n")
+        if cut < limit // 2:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    parts.append(text)
+    return parts
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class StreamingReply:
+    """Reply that grows as tokens arrive - throttled edits, split at the message limit"""
+
+    def __init__(self, message: Message, edit_interval: float, limit: int = Config.TELEGRAM_MESSAGE_LIMIT):
+        self.message = message
+        self.edit_interval = edit_interval
+        self.limit = limit
+        self.sent: List[Message] = []
+        self.shown: List[str] = []
+        self.next_edit = 0.0
+
+    async def update(self, text: str):
+        """Show the partial text if the edit throttle allows - never blocks on rate limits"""
+        if time.monotonic() < self.next_edit:
+            return
+        try:
+            await self._render(text, parse_mode=None)
+        except RetryAfter as e:
+            # Skip interim edits until Telegram allows them again
+            self.next_edit = time.monotonic() + _retry_seconds(e)
+            return
+        self.next_edit = time.monotonic() + self.edit_interval
+
+    async def finish(self, text: str):
+        """Render the final text as Markdown, falling back to plain text"""
+        for _ in range(3):
+            try:
+                try:
+                    await self._render(text, parse_mode="Markdown")
+                except BadRequest as e:
+                    if "not modified" in str(e).lower():
+                        return
+                    # Unbalanced Markdown in the model output - send it unformatted
+                    await self._render(text, parse_mode=None, force=True)
+                return
+            except RetryAfter as e:
+                await asyncio.sleep(_retry_seconds(e))
+
+    async def _render(self, text: str, parse_mode, force: bool = False):
+        for i, part in enumerate(split_message(text, self.limit)):
+            if not part.strip():
+                continue
+            if i < len(self.sent):
+                if part == self.shown[i] and not parse_mode and not force:
+                    continue
+                try:
+                    await self.sent[i].edit_text(part, parse_mode=parse_mode, disable_web_page_preview=False)
+                except BadRequest as e:
+                    if "not modified" not in str(e).lower():
+                        raise
+                self.shown[i] = part
+            else:
+                sent = await self.message.reply_text(part, parse_mode=parse_mode, disable_web_page_preview=False)
+                self.sent.append(sent)
+                self.shown.append(part)
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Up to max_workers updates run at once, but each chat's updates run in order.
+
+    PTB's own semaphore only bounds updates held in memory (max_pending); a
+    chat waiting on its previous message doesn't take a worker slot.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        super().__init__(max_pending)
+        self.workers = asyncio.Semaphore(max_workers)
+        self._chats: Dict[int, list] = {}  # chat_id -> [lock, updates holding or waiting]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self.workers:
+                await coroutine
+            return
+
+        entry = self._chats.setdefault(chat.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0], self.workers:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chats[chat.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+class BackendBusy(Exception):
+    """API answered 429/503 and retrying within the wait budget didn't help"""
+
+    def __init__(self, status: int, retry_after: float):
+        self.status = status
+        self.retry_after = retry_after
+        super().__init__(f"Backend busy ({status}), retry after {retry_after:.0f}s")
+
+
+class BackendError(Exception):
+    """API answered with an unexpected status"""
+
+
+class HttpTransport:
+    """PsychoHealer API over HTTP - for deployments where bot and API run apart"""
+
+    def __init__(self, api_base_url: str = None):
+        self.api_url = f"{api_base_url or Config.API_BASE_URL}/api/v1/psychology/chat"
+        self.stream_url = f"{self.api_url}/stream"
         self.session = None
-    
-    async def init_session(self):
+        # Backend-wide Retry-After from a 503 - later messages wait it out instead of piling on
+        self.backoff_until = 0.0
+
+    async def start(self):
         if not self.session:
-            self.session = aiohttp.ClientSession()
-    
-    async def close_session(self):
+            # One pooled, keep-alive session for every API call the bot makes
+            connector = aiohttp.TCPConnector(
+                limit=Config.BOT_HTTP_MAX_CONNECTIONS,
+                limit_per_host=Config.BOT_HTTP_MAX_CONNECTIONS,
+                ttl_dns_cache=Config.BOT_HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=Config.BOT_HTTP_KEEPALIVE_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
         if self.session:
             await self.session.close()
+            self.session = None
+
+    async def stream(self, query: str, user_id: str) -> AsyncIterator[Tuple[str, dict]]:
+        """(event, data) pairs from the SSE stream endpoint"""
+        await self.start()
+        response = await self._open({"query": query, "user_id": user_id})
+        async with response:
+            if response.status != 200:
+                raise BackendError(f"API returned {response.status}")
+            async for event, data in sse_events(response):
+                yield event, data
+
+    async def _open(self, payload: Dict) -> aiohttp.ClientResponse:
+        """POST to the stream endpoint, waiting out 503 Retry-After within the wait budget"""
+        for attempt in range(Config.TELEGRAM_API_RETRIES + 1):
+            delay = self.backoff_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            response = await self.session.post(
+                self.stream_url,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=Config.TELEGRAM_STREAM_IDLE_TIMEOUT)
+            )
+            if response.status not in (429, 503):
+                return response
+
+            retry_after = float(response.headers.get("Retry-After", "1"))
+            response.release()
+            if response.status == 429:
+                # This user is over their rate limit - retrying only burns more of it
+                raise BackendBusy(429, retry_after)
+            self.backoff_until = max(self.backoff_until, time.monotonic() + retry_after)
+            if retry_after > Config.TELEGRAM_MAX_RETRY_WAIT:
+                break
+        raise BackendBusy(503, max(retry_after, self.backoff_until - time.monotonic()))
+
+
+class EmbeddedTransport:
+    """PsychologyService called in the bot's own event loop.
+
+    Skips JSON encoding, the loopback hop and request validation, and
+    shares caches, routing stats and memory with an API served from the
+    same process (TELEGRAM_EMBEDDED_SERVE_API). The API's admission
+    control still applies.
+    """
+
+    def __init__(self, serve_api: bool = False):
+        self.serve_api = serve_api
+        self.service = None
+        self.admission = None
+        self._container = None
+        self._server = None
+        self._server_task = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._start_lock:
+            if self.service:
+                return
+
+            if self.serve_api:
+                import uvicorn
+                import main as app_module
+                # The API's lifespan then builds the services and owns the shutdown drain
+                self._server = uvicorn.Server(uvicorn.Config(
+                    app_module.app, host=Config.TELEGRAM_EMBEDDED_API_HOST,
+                    port=Config.TELEGRAM_EMBEDDED_API_PORT, log_level="info"
+                ))
+                # Leave SIGINT/SIGTERM to PTB: it stops the bot first, then close() stops the API
+                self._server.capture_signals = nullcontext
+                self._server_task = asyncio.create_task(self._server.serve())
+                while not self._server.started:
+                    if self._server_task.done():
+                        # Startup failed (e.g. port in use) - surface uvicorn's error
+                        await self._server_task
+                        raise RuntimeError("Embedded API server exited during startup")
+                    await asyncio.sleep(0.05)
+                services = app_module.app.state.services
+            else:
+                # Imported here so HTTP-mode bots don't load the service stack
+                from services.container import ServiceContainer
+                self._container = services = ServiceContainer()
+                await self._container.start()
+            self.service = services.psychology
+            self.admission = services.admission
+
+    async def close(self):
+        # Runs from post_shutdown, after PTB has stopped taking updates
+        if self._server:
+            self._server.should_exit = True
+            await self._server_task
+        elif self._container:
+            # No API lifespan in this process - the container drains writes and closes clients
+            await self._container.close()
+
+    async def stream(self, query: str, user_id: str) -> AsyncIterator[Tuple[str, dict]]:
+        """(event, data) pairs straight from PsychologyService"""
+        await self.start()
+        from core.admission import AdmissionRejected
+        try:
+            ticket = await self.admission.admit(user_id)
+        except AdmissionRejected as e:
+            raise BackendBusy(e.status_code, e.retry_after)
+        try:
+            async for event in self.service.stream_psychology_response_async(query=query, user_id=user_id):
+                yield event["event"], event["data"]
+        finally:
+            ticket.release()
+
+
+def create_transport(api_base_url: str = None):
+    """Transport selected by Config.TELEGRAM_TRANSPORT"""
+    if Config.TELEGRAM_TRANSPORT == "embedded":
+        return EmbeddedTransport(serve_api=Config.TELEGRAM_EMBEDDED_SERVE_API)
+    if Config.TELEGRAM_TRANSPORT == "http":
+        return HttpTransport(api_base_url)
+    raise ValueError(f"Unknown Telegram transport: {Config.TELEGRAM_TRANSPORT}")
+
+
+class PsychoBot:
+    def __init__(self, api_base_url: str = None, transport=None):
+        self.transport = transport or create_transport(api_base_url)
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -91,69 +380,83 @@ Note: This is for general support, not professional therapy.
         
         return video_text
     
+    async def keep_typing(self, bot, chat_id: int):
+        """Refresh the typing indicator until cancelled"""
+        while True:
+            try:
+                await bot.send_chat_action(chat_id=chat_id, action="typing")
+            except Exception as e:
+                logger.debug(f"Typing action failed: {e}")
+            await asyncio.sleep(Config.TELEGRAM_TYPING_INTERVAL)
+
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle user messages"""
+        """Handle user messages - the reply is streamed in as the model generates it"""
         user_id = str(update.effective_user.id)
         user_message = update.message.text
         
-        # Show typing indicator
-        await context.bot.send_chat_action(
-            chat_id=update.effective_chat.id, 
-            action="typing"
-        )
+        # Show typing indicator until the first text appears
+        typing = asyncio.create_task(self.keep_typing(context.bot, update.effective_chat.id))
+        reply = StreamingReply(update.message, Config.TELEGRAM_EDIT_INTERVAL)
+        bot_response = ""
         
         try:
-            await self.init_session()
+            youtube_videos = []
+            model_used = ""
             
-            # Call your API
-            async with self.session.post(
-                self.api_url,
-                json={"query": user_message, "user_id": user_id},
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Get the main response
-                    bot_response = data.get('response', 'No response available')
-                    
-                    # Get YouTube videos
-                    youtube_videos = data.get('youtube_videos', [])
-                    
-                    # Format the complete message
-                    complete_message = bot_response
-                    
-                    # Add YouTube videos if available
-                    if youtube_videos:
-                        video_section = self.format_youtube_videos(youtube_videos)
-                        complete_message += video_section
-                    
-                    # Send the complete message with videos
-                    await update.message.reply_text(
-                        complete_message,
-                        parse_mode='Markdown',
-                        disable_web_page_preview=False  # Enable link previews for videos
-                    )
-                    
-                    # Send additional info about model used (for debugging)
-                    model_used = data.get('model_used', '')
-                    if model_used and context.args and '--debug' in context.args:
-                        await update.message.reply_text(
-                            f" Model used: {model_used}",
-                            parse_mode='Markdown'
-                        )
-                
-                else:
-                    await update.message.reply_text(
-                        "I'm having trouble right now. Please try again in a moment."
-                    )
+            # Call your API - over HTTP or in-process, depending on the transport
+            async with aclosing(self.transport.stream(user_message, user_id)) as events:
+                async for event, data in events:
+                    if event == "token":
+                        bot_response += data["text"]
+                        if bot_response.strip():
+                            typing.cancel()
+                            await reply.update(bot_response)
+                    elif event == "meta":
+                        model_used = data.get("model_used", "")
+                    elif event == "videos":
+                        youtube_videos = data.get("youtube_videos", [])
+                    elif event == "done":
+                        bot_response = data.get("response", bot_response)
+                    elif event == "error":
+                        bot_response = data.get("response", "No response available")
+
+            typing.cancel()
+            
+            # Final render with formatting and the recommended videos
+            complete_message = (bot_response or "No response available") + self.format_youtube_videos(youtube_videos)
+            await reply.finish(complete_message)
+            
+            # Send additional info about model used (for debugging)
+            if model_used and context.args and '--debug' in context.args:
+                await update.message.reply_text(
+                    f" Model used: {model_used}",
+                    parse_mode='Markdown'
+                )
         
-        except Exception as e:
-            logger.error(f"Error: {e}")
+        except BackendBusy as e:
+            logger.warning(str(e))
+            if e.status == 429:
+                text = f"You're sending messages a little fast. Please wait {e.retry_after:.0f} seconds and try again."
+            else:
+                text = "I'm getting a lot of messages right now. Please try again in a minute."
+            await update.message.reply_text(text)
+
+        except BackendError as e:
+            logger.error(str(e))
             await update.message.reply_text(
-                "Sorry, I encountered an error. Please try again."
+                "I'm having trouble right now. Please try again in a moment."
             )
+
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            if reply.sent:
+                await reply.finish(bot_response + "\n\n_(Response interrupted - please try again.)_")
+            else:
+                await update.message.reply_text(
+                    "Sorry, I encountered an error. Please try again."
+                )
+        finally:
+            typing.cancel()
     
     async def setup_commands(self, app):
         """Set up bot commands menu"""
@@ -164,9 +467,20 @@ Note: This is for general support, not professional therapy.
         ]
         await app.bot.set_my_commands(commands)
     
-    def run(self):
-        """Run the bot"""
-        app = ApplicationBuilder().token(Config.TELEGRAM_BOT_KEY).build()
+    def build_application(self):
+        """Application with handlers and lifecycle hooks, not yet running"""
+        builder = (
+            ApplicationBuilder()
+            .token(Config.TELEGRAM_BOT_KEY)
+            .concurrent_updates(PerChatUpdateProcessor(
+                Config.TELEGRAM_CONCURRENT_UPDATES,
+                Config.TELEGRAM_MAX_PENDING_UPDATES
+            ))
+        )
+        if Config.TELEGRAM_API_BASE_URL:
+            # Alternate Bot API server (local Bot API server or a simulation stub)
+            builder = builder.base_url(f"{Config.TELEGRAM_API_BASE_URL}/bot")
+        app = builder.build()
         
         # Add handlers
         app.add_handler(CommandHandler("start", self.start))
@@ -174,19 +488,37 @@ Note: This is for general support, not professional therapy.
         app.add_handler(CommandHandler("clear", self.clear_history))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         
-        # Set up commands after app is built
+        # Set up commands and the API session after app is built
         async def post_init(app):
             await self.setup_commands(app)
+            await self.transport.start()
         
         app.post_init = post_init
         
         # Cleanup on shutdown
         async def cleanup(app):
-            await self.close_session()
+            await self.transport.close()
         app.post_shutdown = cleanup
+        return app
+
+    def run(self):
+        """Run the bot - long polling, or a webhook listener when TELEGRAM_MODE=webhook"""
+        app = self.build_application()
         
-        logger.info("PsychoHealer Bot is starting...")
-        app.run_polling(drop_pending_updates=True)
+        if Config.TELEGRAM_MODE == "webhook":
+            logger.info(f"PsychoHealer Bot is starting (webhook on port {Config.TELEGRAM_WEBHOOK_PORT})...")
+            app.run_webhook(
+                listen=Config.TELEGRAM_WEBHOOK_LISTEN,
+                port=Config.TELEGRAM_WEBHOOK_PORT,
+                url_path=Config.TELEGRAM_WEBHOOK_PATH,
+                webhook_url=f"{Config.TELEGRAM_WEBHOOK_URL.rstrip('/')}/{Config.TELEGRAM_WEBHOOK_PATH}",
+                secret_token=Config.TELEGRAM_WEBHOOK_SECRET,
+                max_connections=Config.TELEGRAM_WEBHOOK_MAX_CONNECTIONS,
+                drop_pending_updates=True
+            )
+        else:
+            logger.info("PsychoHealer Bot is starting...")
+            app.run_polling(drop_pending_updates=True)
 
 if __name__ == "__main__":
     bot = PsychoBot()